@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Kontrola przyjmowania żądań (admission control) dla API.
+
+Każdy endpoint ma limit żądań obsługiwanych jednocześnie i krótką kolejkę
+oczekujących. Gdy oba są pełne, żądanie jest od razu odrzucane (503 +
+Retry-After) — zamiast przyjmować wszystko i pozwolić, by czas odpowiedzi
+rósł dla wszystkich, aż klienci zaczną zrywać połączenia. Opcjonalnie
+każdy klient (klucz API lub IP) ma limit żądań na minutę (token bucket).
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class AdmissionLimiter:
+    """Limit żądań w trakcie obsługi + ograniczona kolejka oczekujących"""
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int = 0, queue_timeout: float = 5.0):
+        self.name = name
+        self.max_in_flight = max_in_flight  # <= 0: bez limitu
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._queued = 0
+        self._peak_in_flight = 0
+        self._peak_queued = 0
+        self._admitted = 0
+        self._rejected_full = 0
+        self._rejected_timeout = 0
+        # Średni czas obsługi (EWMA) — do oszacowania Retry-After
+        self._service_time = 1.0
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Przyjmij żądanie (ewentualnie po odczekaniu w kolejce); False = odrzuć.
+        timeout skraca czas oczekiwania w kolejce (np. do pozostałego czasu żądania).
+        """
+        with self._condition:
+            if self.max_in_flight <= 0 or self._in_flight < self.max_in_flight:
+                self._admit()
+                return True
+
+            if self._queued >= self.max_queue:
+                self._rejected_full += 1
+                return False
+
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+            try:
+                wait = self.queue_timeout if timeout is None else min(self.queue_timeout, timeout)
+                admitted = self._condition.wait_for(
+                    lambda: self._in_flight < self.max_in_flight, wait
+                )
+            finally:
+                self._queued -= 1
+
+            if not admitted:
+                self._rejected_timeout += 1
+                return False
+            self._admit()
+            return True
+
+    def _admit(self) -> None:
+        self._in_flight += 1
+        self._admitted += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def release(self, elapsed: float) -> None:
+        """Zwolnij miejsce po zakończeniu obsługi żądania"""
+        with self._condition:
+            self._in_flight -= 1
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+            self._condition.notify()
+
+    def retry_after(self) -> int:
+        """Szacunkowy czas (s), po którym zwolni się miejsce"""
+        with self._condition:
+            slots = max(1, self.max_in_flight)
+            return max(1, math.ceil(self._service_time * (self._queued + 1) / slots))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "peak_in_flight": self._peak_in_flight,
+                "peak_queued": self._peak_queued,
+                "admitted": self._admitted,
+                "rejected_full": self._rejected_full,
+                "rejected_timeout": self._rejected_timeout,
+                "avg_service_seconds": round(self._service_time, 3),
+            }
+
+
+class ClientQuota:
+    """Limit żądań na klienta (token bucket): rate_per_minute, z możliwą serią do burst"""
+
+    # Powyżej tylu śledzonych klientów usuwane są ci z pełnym kubełkiem (nieaktywni)
+    MAX_CLIENTS = 10000
+
+    def __init__(self, rate_per_minute: float, burst: int = 0):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst if burst > 0 else max(1, int(rate_per_minute))
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._rejected = 0
+
+    def allow(self, client: str) -> Tuple[bool, int]:
+        """Zwraca (czy przyjąć, po ilu sekundach ponowić)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(client, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+
+            if tokens >= 1.0:
+                self._buckets[client] = (tokens - 1.0, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[client] = (tokens, now)
+                self._rejected += 1
+                allowed, retry_after = False, max(1, math.ceil((1.0 - tokens) / self.rate))
+
+            if len(self._buckets) > self.MAX_CLIENTS:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        for client, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * self.rate >= self.burst:
+                del self._buckets[client]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_per_minute": round(self.rate * 60, 3),
+                "burst": self.burst,
+                "clients": len(self._buckets),
+                "rejected": self._rejected,
+            }
@@ -3,28 +3,570 @@
 API dla YouTube Transcript Downloader - do integracji z n8n
 """
 
+import functools
+import gzip
+import hashlib
+import itertools
 import json
 import os
+import re
+import sqlite3
 import sys
-from flask import Flask, request, jsonify
+import threading
+import time
+from collections import OrderedDict
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.middleware.proxy_fix import ProxyFix
 from youtube_transcript_downloader import (
     get_video_id_from_url,
     get_video_metadata,
+    parse_metadata_fields,
+    METADATA_FIELDS,
     fetch_transcript,
-    save_transcript,
+    fetch_translations,
+    archive_video,
+    _create_transcript_api,
+    with_name_suffix,
+    default_output_file,
+    format_transcript,
+    build_start_index,
+    slice_transcript,
+    write_transcript_file,
+    write_rendered_formats,
+    parse_output_formats,
+    split_list,
+    OUTPUT_FORMATS,
+    base64_path_for,
     MarkdownFormatter,
     sanitize_filename,
     encode_to_base64
 )
+from notes_agent import get_model, stream_notes, create_notes, notes_path_for, cached_notes
+from transcript_compactor import compact_markdown, parse_timestamp
+from transcript_index import find_documents, is_slice_path, search as search_index
+from write_behind import WriteBehindWriter
+from admission import AdmissionLimiter, ClientQuota
+from deadline import Deadline
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Szybsza serializacja JSON (orjson), gdy pakiet jest dostępny"""
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
 
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+# Bez escape'owania znaków spoza ASCII i bez sortowania kluczy — mniej bajtów i mniej pracy
+app.json.ensure_ascii = False
+app.json.sort_keys = False
+
+# Pliki z /files wysyła serwer proxy (nginx/Apache), jeśli obsługuje X-Sendfile
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+
+# Odpowiedzi mniejsze niż próg nie są kompresowane
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/markdown', 'text/plain')
+CONTENT_MODES = ('both', 'text', 'base64')
+# Pojedynczy format w /transcript może być też 'raw' (surowe segmenty w JSON)
+TRANSCRIPT_FORMATS = OUTPUT_FORMATS + ('raw',)
+
+# Pamięć podręczna pobranych transkrypcji (LRU + TTL) — kolejne zapytania o ten sam
+# film, np. o różne wycinki czasu, nie pobierają transkrypcji z YouTube ponownie
+TRANSCRIPT_CACHE_SIZE = int(os.environ.get('TRANSCRIPT_CACHE_SIZE', 32))
+TRANSCRIPT_CACHE_TTL = int(os.environ.get('TRANSCRIPT_CACHE_TTL', 600))
+_transcript_cache = OrderedDict()
+_transcript_cache_lock = threading.Lock()
+
+# Zapis plików w tle — odpowiedź jest budowana z pamięci, nie czeka na dysk.
+# Pełna kolejka (WRITE_QUEUE_SIZE) spowalnia przyjmowanie nowych zapisów zamiast rosnąć.
+WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '1') != '0'
+_writer = WriteBehindWriter(
+    max_pending=int(os.environ.get('WRITE_QUEUE_SIZE', 64)),
+    workers=int(os.environ.get('WRITE_WORKERS', 2))
+)
+
+# Archiwum plików serwowanych przez /files (pliki .md są odnajdywane przez indeks)
+FILES_DIR = os.environ.get('OUTPUT_DIR', 'Transcripts')
+FILE_MIMETYPES = {
+    'md': 'text/markdown',
+    'notes': 'text/markdown',
+    'b64': 'text/plain',
+    'text': 'text/plain',
+    'srt': 'application/x-subrip',
+    'vtt': 'text/vtt',
+    'json': 'application/json',
+}
+_VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{6,20}$')
+# ETag = SHA-256 treści, liczony raz na wersję pliku (ścieżka, rozmiar, mtime)
+_etag_cache = OrderedDict()
+_etag_cache_lock = threading.Lock()
+ETAG_CACHE_SIZE = 1024
+
+# Kontrola przyjmowania żądań: limit obsługiwanych jednocześnie + krótka kolejka na
+# endpoint ({NAZWA}_MAX_IN_FLIGHT, {NAZWA}_MAX_QUEUE; 0 w MAX_IN_FLIGHT = bez limitu).
+# Nadmiarowe żądania dostają od razu 503 z Retry-After.
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 5))
+
+def _limiter(name, max_in_flight, max_queue):
+    prefix = name.upper()
+    return AdmissionLimiter(
+        name,
+        int(os.environ.get(f'{prefix}_MAX_IN_FLIGHT', max_in_flight)),
+        int(os.environ.get(f'{prefix}_MAX_QUEUE', max_queue)),
+        ADMISSION_QUEUE_TIMEOUT
+    )
+
+_limiters = {
+    "transcript": _limiter("transcript", 8, 16),
+    "metadata": _limiter("metadata", 8, 16),
+    "list": _limiter("list", 8, 16),
+    "notes": _limiter("notes", 4, 8),
+    "channels": _limiter("channels", 1, 0),
+}
+
+# Limit żądań na klienta; 0 = wyłączony. Klientem jest klucz z X-API-Key, ale tylko
+# klucz skonfigurowany w API_KEYS — dowolny nagłówek dawałby przy każdej zmianie nowy
+# limit. W pozostałych wypadkach klientem jest adres IP.
+CLIENT_RATE_LIMIT = float(os.environ.get('CLIENT_RATE_LIMIT', 0))
+_client_quota = ClientQuota(CLIENT_RATE_LIMIT, int(os.environ.get('CLIENT_BURST', 0))) if CLIENT_RATE_LIMIT > 0 else None
+API_KEYS = frozenset(key.strip() for key in os.environ.get('API_KEYS', '').split(',') if key.strip())
+
+# Za serwerem proxy (nginx, load balancer) remote_addr to adres proxy — wszyscy klienci
+# trafialiby do jednego limitu. TRUSTED_PROXIES = liczba proxy, którym ufamy w X-Forwarded-For.
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+
+
+def _client_key():
+    api_key = request.headers.get('X-API-Key')
+    if api_key and api_key in API_KEYS:
+        return f"key:{api_key}"
+    return f"ip:{request.remote_addr}"
+
+
+def _overloaded(status, message, retry_after):
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def admission_controlled(name, with_deadline=False):
+    """
+    Dekorator endpointu: limit klienta (429), limit obciążenia (503), pomiar czasu obsługi.
+    
+    with_deadline: deadline_ms żądania liczony od wejścia do serwera (g.deadline) —
+    czas oczekiwania w kolejce wlicza się do limitu i jest przez niego ograniczony.
+    """
+    limiter = _limiters[name]
+    
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            deadline = None
+            if with_deadline:
+                try:
+                    deadline = g.deadline = _parse_deadline(request.get_json(silent=True) or {})
+                except (TypeError, ValueError):
+                    return jsonify({"error": "deadline_ms musi być dodatnią liczbą milisekund"}), 400
+            
+            if _client_quota is not None:
+                allowed, retry_after = _client_quota.allow(_client_key())
+                if not allowed:
+                    return _overloaded(429, "Przekroczono limit żądań dla klienta", retry_after)
+            
+            if not limiter.acquire(deadline.remaining() if deadline else None):
+                return _overloaded(503, "Serwer przeciążony, spróbuj ponownie później", limiter.retry_after())
+            
+            started = time.monotonic()
+            
+            def release():
+                limiter.release(time.monotonic() - started)
+            
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except BaseException:
+                release()
+                raise
+            
+            # Odpowiedź strumieniowa zajmuje miejsce do końca wysyłania
+            if response.is_streamed:
+                response.call_on_close(release)
+            else:
+                release()
+            return response
+        return wrapper
+    return decorator
+
+
+@app.after_request
+def compress_response(response):
+    """Kompresja gzip/brotli zgodnie z nagłówkiem Accept-Encoding"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    accept = request.accept_encodings
+    if brotli is not None and accept.quality('br') > 0:
+        response.set_data(brotli.compress(data, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif accept.quality('gzip') > 0:
+        response.set_data(gzip.compress(data, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+    
+    return response
+
+
+def _cached_fetch_transcript(deadline=None, **kwargs):
+    """
+    fetch_transcript z pamięcią podręczną; zwraca (transkrypcja, indeks czasów startu).
+    Wynik niepełny z powodu deadline (np. pominięte tłumaczenie) nie jest zapamiętywany.
+    """
+    key = tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(kwargs.items())
+    )
+    now = time.monotonic()
+    
+    with _transcript_cache_lock:
+        entry = _transcript_cache.get(key)
+        if entry and now - entry[0] < TRANSCRIPT_CACHE_TTL:
+            _transcript_cache.move_to_end(key)
+            return entry[1], entry[2]
+    
+    partial_before = len(deadline.partial) if deadline else 0
+    transcript = fetch_transcript(deadline=deadline, **kwargs)
+    if not transcript:
+        return transcript, []
+    
+    starts = build_start_index(transcript)
+    complete = not deadline or len(deadline.partial) == partial_before
+    if TRANSCRIPT_CACHE_SIZE > 0 and complete:
+        with _transcript_cache_lock:
+            _transcript_cache[key] = (now, transcript, starts)
+            _transcript_cache.move_to_end(key)
+            while len(_transcript_cache) > TRANSCRIPT_CACHE_SIZE:
+                _transcript_cache.popitem(last=False)
+    return transcript, starts
+
+
+def _parse_range(data):
+    """Parametry wycinka: start/end (sekundy lub [HH:]MM:SS), first_segment/last_segment (włącznie)"""
+    start = data.get('start')
+    end = data.get('end')
+    first_segment = data.get('first_segment')
+    last_segment = data.get('last_segment')
+    
+    if all(value is None for value in (start, end, first_segment, last_segment)):
+        return None
+    
+    return {
+        "start": parse_timestamp(str(start)) if start is not None else None,
+        "end": parse_timestamp(str(end)) if end is not None else None,
+        "first_segment": int(first_segment) if first_segment is not None else None,
+        "last_segment": int(last_segment) if last_segment is not None else None
+    }
+
+
+def _apply_range(transcript, window, starts=None):
+    """Wytnij fragment transkrypcji; zwraca (wycinek, opis zakresu do odpowiedzi)"""
+    if starts is None:
+        starts = build_start_index(transcript)
+    
+    sliced, lo, hi = slice_transcript(transcript, starts=starts, **window)
+    info = {
+        "first_segment": lo,
+        "last_segment": hi - 1 if hi > lo else None,
+        "segments": hi - lo,
+        "total_segments": len(starts),
+        "start": starts[lo] if hi > lo else None,
+        "end": starts[hi - 1] + transcript[hi - 1].duration if hi > lo else None
+    }
+    return sliced, info
+
+
+def _parse_deadline(data):
+    """Deadline żądania z deadline_ms (body) lub nagłówka X-Deadline-Ms; bez nich — bez limitu"""
+    value = data.get('deadline_ms')
+    if value is None:
+        value = request.headers.get('X-Deadline-Ms')
+    return Deadline.from_ms(value)
+
+
+def _report_partial(result, deadline):
+    """Dopisz do odpowiedzi pola pominięte lub niepełne z powodu deadline"""
+    if deadline.partial:
+        result["partial"] = list(deadline.partial)
+
+
+def _save_allowed(save_to_file, deadline):
+    """Wynik niepełny (deadline) nie jest zapisywany — nie nadpisuje pełnego pliku w archiwum"""
+    if save_to_file and deadline.partial:
+        deadline.mark_partial("saved_to")
+        return False
+    return save_to_file
+
+
+def _fetch_failed(deadline):
+    """Brak transkrypcji: 504, jeśli zabrakło czasu, w innym wypadku 404"""
+    if deadline.expired():
+        deadline.mark_partial("transcript")
+        return jsonify({
+            "error": f"Nie udało się pobrać transkrypcji w czasie {deadline.budget_ms:g} ms",
+            "partial": list(deadline.partial)
+        }), 504
+    return jsonify({"error": "Nie udało się pobrać transkrypcji"}), 404
+
+
+def _parse_formats(value):
+    """
+    'md' → 'md' (jeden format); 'md,srt' lub ['md', 'srt'] → lista (wiele formatów z jednego pobrania).
+    ValueError dla nieznanych formatów.
+    """
+    if isinstance(value, str) and ',' not in value:
+        value = value.strip()
+        if value not in TRANSCRIPT_FORMATS:
+            raise ValueError(f"Nieznany format: {value} (dostępne: {', '.join(TRANSCRIPT_FORMATS)})")
+        return value
+    formats = parse_output_formats(value)
+    if not formats:
+        raise ValueError("Pusta lista formatów")
+    return formats
+
+
+def _parse_fields(fields):
+    """'a,metadata.title' lub ['a', 'metadata.title'] → lista pól"""
+    if not fields:
+        return []
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    return [field.strip() for field in fields if field and field.strip()]
+
+
+def _metadata_fields_from(fields):
+    """
+    Pola metadanych wynikające z fields (np. metadata.title) — pozwala pominąć
+    pobieranie strony filmu, gdy klient i tak chce tylko tanie pola.
+    None = wszystkie pola (brak fields, całe "metadata" lub brak metadata.* w fields).
+    """
+    if not fields or 'metadata' in fields:
+        return None
+    requested = [field.partition('.')[2] for field in fields if field.startswith('metadata.')]
+    requested = [field for field in requested if field in METADATA_FIELDS]
+    if not requested:
+        return None
+    # Tytuł zawsze — od niego zależy nazwa zapisywanego pliku
+    return ['title'] + [field for field in requested if field != 'title']
+
+
+def _select_fields(result, fields):
+    """Zostaw w odpowiedzi tylko wybrane pola (obsługuje jeden poziom zagnieżdżenia, np. metadata.title)"""
+    if not fields:
+        return result
+    
+    shaped = {"success": result.get("success", True)}
+    # Informacja o niepełnym wyniku (deadline) jest zwracana zawsze
+    if "partial" in result:
+        shaped["partial"] = result["partial"]
+    for field in fields:
+        key, _, sub_key = field.partition('.')
+        if key not in result:
+            continue
+        if sub_key and isinstance(result[key], dict):
+            if sub_key in result[key]:
+                shaped.setdefault(key, {})[sub_key] = result[key][sub_key]
+        else:
+            shaped[key] = result[key]
+    return shaped
+
+
+def _apply_content_mode(part, content_mode):
+    """Zwróć treść jako tekst, base64 lub oba (domyślnie) — dla pojedynczego wyniku transkrypcji"""
+    if content_mode == 'text':
+        part.pop('base64', None)
+    elif content_mode == 'base64':
+        if isinstance(part.get('transcripts'), dict):
+            part['transcripts'] = {
+                format_type: encode_to_base64(content) if isinstance(content, str) else content
+                for format_type, content in part['transcripts'].items()
+            }
+            part.pop('base64', None)
+        else:
+            if part.get('base64') is None and isinstance(part.get('transcript'), str):
+                part['base64'] = encode_to_base64(part['transcript'])
+            part.pop('transcript', None)
+    return part
+
+
+def _shape_response(result, fields, content_mode):
+    """Dopasuj odpowiedź /transcript do parametrów fields i content"""
+    _apply_content_mode(result, content_mode)
+    for translation in (result.get('translations') or {}).values():
+        _apply_content_mode(translation, content_mode)
+    return _select_fields(result, fields)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "youtube-transcript-api"})
+    return jsonify({"status": "healthy", "service": "youtube-transcript-api", "writes": _writer.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Obciążenie: żądania w trakcie i w kolejce, odrzucenia, zapisy w tle, pamięć podręczna"""
+    with _transcript_cache_lock:
+        cached = len(_transcript_cache)
+    return jsonify({
+        "endpoints": {name: limiter.stats() for name, limiter in _limiters.items()},
+        "client_quota": _client_quota.stats() if _client_quota is not None else None,
+        "writes": _writer.stats(),
+        "transcript_cache": {"entries": cached, "max_entries": TRANSCRIPT_CACHE_SIZE}
+    })
+
+def _persist(formatted_content, output_file, format_type, encode_base64, base64_content=None, durable=False):
+    """Zapisz plik od razu (durable) albo zleć zapis w tle"""
+    if durable or not WRITE_BEHIND:
+        write_transcript_file(formatted_content, output_file, format_type, encode_base64, base64_content)
+    else:
+        _writer.submit(write_transcript_file, formatted_content, output_file, format_type, encode_base64, base64_content)
+
+def _render_transcript(transcript, video_id, metadata, format_type, save_to_file, output_dir, encode_base64, language_code=None, include_base64=True, durable=False, deadline=None):
+    """Zapisz (opcjonalnie) i sformatuj transkrypcję do odpowiedzi API"""
+    if isinstance(format_type, list):
+        return _render_formats(transcript, video_id, metadata, format_type, save_to_file, output_dir, encode_base64, language_code, include_base64, durable, deadline)
+    
+    result = {
+        "transcript": None,
+        "base64": None
+    }
+    formatted_content = None
+    
+    # Zapisz do pliku jeśli wymagane
+    if save_to_file:
+        output_file = default_output_file(output_dir, format_type, video_id, metadata)
+        if language_code:
+            output_file = with_name_suffix(output_file, language_code)
+        
+        # Treść pliku i base64 liczone w pamięci — odpowiedź nie czyta pliku z dysku
+        formatted_content = format_transcript(transcript, format_type, metadata)
+        base64_content = None
+        if encode_base64 and format_type == 'md':
+            base64_content = encode_to_base64(formatted_content)
+        
+        _persist(formatted_content, output_file, format_type, encode_base64, base64_content, durable)
+        result["saved_to"] = output_file
+        
+        # Dodaj ścieżkę do pliku base64 (i jego treść, pomijaną przy content=text)
+        if base64_content:
+            result["base64_file"] = base64_path_for(output_file)
+            if include_base64:
+                result["base64"] = base64_content
+    
+    # Formatuj transkrypcję do odpowiedzi (md i text — ta sama treść co w pliku, bez drugiego renderowania)
+    if formatted_content is not None and format_type in ('md', 'text'):
+        result["transcript"] = formatted_content
+    elif format_type == 'json':
+        formatter = MarkdownFormatter()
+        result["transcript"] = formatter.format_transcript(transcript, metadata=metadata)
+    elif format_type == 'raw':
+        # Surowe dane transkrypcji
+        result["transcript"] = transcript.to_raw_data() if hasattr(transcript, 'to_raw_data') else str(transcript)
+    else:
+        # Formatuj do tekstowej formy
+        if format_type == 'md':
+            formatter = MarkdownFormatter()
+            result["transcript"] = formatter.format_transcript(transcript, metadata=metadata)
+        else:
+            from youtube_transcript_api.formatters import TextFormatter
+            formatter = TextFormatter()
+            result["transcript"] = formatter.format_transcript(transcript)
+    
+    return result
+
+def _render_formats(transcript, video_id, metadata, formats, save_to_file, output_dir, encode_base64, language_code=None, include_base64=True, durable=False, deadline=None):
+    """
+    Wiele formatów z jednego pobrania — renderowanie w pamięci, zapis plików równolegle lub w tle.
+    Po upływie deadline renderowany jest już tylko pierwszy format, pozostałe trafiają do partial.
+    """
+    formats = list(dict.fromkeys(formats))
+    result = {
+        "transcripts": {},
+        "base64": None,
+        "artifacts": []
+    }
+    
+    for format_type in formats:
+        if deadline and result["transcripts"] and deadline.expired():
+            prefix = f"translations.{language_code}." if language_code else ""
+            deadline.mark_partial(f"{prefix}transcripts.{format_type}")
+            continue
+        try:
+            result["transcripts"][format_type] = format_transcript(transcript, format_type, metadata)
+        except Exception as e:
+            print(f"Błąd podczas formatowania ({format_type}): {e}")
+    
+    base64_content = None
+    if encode_base64 and "md" in result["transcripts"]:
+        base64_content = encode_to_base64(result["transcripts"]["md"])
+        if include_base64:
+            result["base64"] = base64_content
+    
+    if save_to_file:
+        output_files = {}
+        for format_type in result["transcripts"]:
+            output_file = default_output_file(output_dir, format_type, video_id, metadata)
+            if language_code:
+                output_file = with_name_suffix(output_file, language_code)
+            output_files[format_type] = output_file
+        
+        if durable or not WRITE_BEHIND:
+            artifacts = write_rendered_formats(result["transcripts"], output_files, encode_base64)
+            for artifact in artifacts:
+                artifact.pop("content", None)
+            result["artifacts"] = artifacts
+        else:
+            for format_type, output_file in output_files.items():
+                artifact = {"format": format_type, "path": output_file}
+                if format_type == "md" and base64_content:
+                    artifact["base64_file"] = base64_path_for(output_file)
+                _persist(result["transcripts"][format_type], output_file, format_type, encode_base64,
+                         base64_content if format_type == "md" else None)
+                result["artifacts"].append(artifact)
+    
+    return result
 
 @app.route('/transcript', methods=['POST'])
+@admission_controlled('transcript', with_deadline=True)
 def get_transcript():
     """Główny endpoint do pobierania transkrypcji"""
     try:
@@ -42,8 +584,18 @@ def get_transcript():
         
         # Parametry opcjonalne
         languages = data.get('languages', ['pl', 'en'])
-        format_type = data.get('format', 'md')
+        try:
+            format_type = _parse_formats(data.get('formats') or data.get('format', 'md'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         translate_to = data.get('translate')
+        if isinstance(translate_to, list):
+            # Pusta lista = bez tłumaczenia (jak brak pola translate)
+            translate_to = split_list(translate_to) or None
+        elif translate_to:
+            # "de,fr" → tłumaczenia jak dla listy; pojedynczy kod zostaje na ścieżce jednego języka
+            codes = split_list(translate_to)
+            translate_to = codes if len(codes) > 1 else (codes[0] if codes else None)
         preserve_formatting = data.get('preserve_formatting', False)
         exclude_generated = data.get('exclude_generated', False)
         exclude_manually_created = data.get('exclude_manually_created', False)
@@ -51,24 +603,34 @@ def get_transcript():
         output_dir = data.get('output_dir', 'Transcripts')
         include_metadata = data.get('include_metadata', True)
         encode_base64 = data.get('encode_base64', True)
+        durable = data.get('durable', False)
+        fields = _parse_fields(data.get('fields'))
+        content_mode = data.get('content', 'both')
         
-        # Pobierz metadane jeśli wymagane
-        metadata = {}
-        if include_metadata:
-            metadata = get_video_metadata(video_id)
+        if content_mode not in CONTENT_MODES:
+            return jsonify({"error": f"content musi mieć jedną z wartości: {', '.join(CONTENT_MODES)}"}), 400
         
-        # Pobierz transkrypcję
-        transcript = fetch_transcript(
-            video_id=video_id,
-            languages=languages,
-            preserve_formatting=preserve_formatting,
-            translate_to=translate_to,
-            exclude_generated=exclude_generated,
-            exclude_manually_created=exclude_manually_created
-        )
+        try:
+            metadata_fields = parse_metadata_fields(data.get('metadata_fields')) or _metadata_fields_from(fields)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        if not transcript:
-            return jsonify({"error": "Nie udało się pobrać transkrypcji"}), 404
+        deadline = g.deadline
+        
+        try:
+            window = _parse_range(data)
+        except ValueError:
+            return jsonify({"error": "Nieprawidłowy zakres (start/end/first_segment/last_segment)"}), 400
+        
+        if window:
+            # Wycinek nie jest zapisywany — nie nadpisuje pełnej transkrypcji w archiwum
+            save_to_file = False
+        
+        # Pobierz metadane jeśli wymagane. Zapisywany plik zawsze dostaje pełne metadane —
+        # fields i metadata_fields ograniczają tylko odpowiedź, nie archiwum
+        metadata = {}
+        if include_metadata:
+            metadata = get_video_metadata(video_id, None if save_to_file else metadata_fields, deadline)
         
         # Przygotuj wynik
         result = {
@@ -81,57 +643,76 @@ def get_transcript():
         
         # Dodaj metadane jeśli dostępne
         if metadata:
-            result["metadata"] = metadata
+            result["metadata"] = {field: metadata.get(field) for field in metadata_fields} if metadata_fields else metadata
         
-        # Zapisz do pliku jeśli wymagane
-        if save_to_file:
-            os.makedirs(output_dir, exist_ok=True)
-            
-            if format_type == 'md' and metadata.get('title'):
-                safe_title = sanitize_filename(metadata['title'])
-                output_file = os.path.join(output_dir, f"{safe_title}.{format_type}")
-            else:
-                output_file = os.path.join(output_dir, f"{video_id}.{format_type}")
+        if isinstance(translate_to, list):
+            # Wiele tłumaczeń w jednym żądaniu — źródło ustalane raz, tłumaczenia równolegle
+            translations = fetch_translations(
+                video_id=video_id,
+                translate_to=translate_to,
+                languages=languages,
+                preserve_formatting=preserve_formatting,
+                exclude_generated=exclude_generated,
+                exclude_manually_created=exclude_manually_created,
+                deadline=deadline
+            )
             
-            save_transcript(transcript, output_file, format_type, video_id, metadata, encode_base64)
-            result["saved_to"] = output_file
+            if not translations:
+                return _fetch_failed(deadline)
             
-            # Dodaj ścieżkę do pliku base64 jeśli został utworzony
-            if encode_base64 and format_type == 'md':
-                base64_file = output_file.replace('.md', '.b64')
-                if os.path.exists(base64_file):
-                    result["base64_file"] = base64_file
-                    
-                    # Odczytaj zawartość base64 dla odpowiedzi API
-                    try:
-                        with open(base64_file, 'r', encoding='utf-8') as f:
-                            result["base64"] = f.read()
-                    except Exception as e:
-                        print(f"Błąd podczas odczytu pliku base64: {e}")
-        
-        # Formatuj transkrypcję do odpowiedzi
-        if format_type == 'json':
-            formatter = MarkdownFormatter()
-            result["transcript"] = formatter.format_transcript(transcript, metadata=metadata)
-        elif format_type == 'raw':
-            # Surowe dane transkrypcji
-            result["transcript"] = transcript.to_raw_data() if hasattr(transcript, 'to_raw_data') else str(transcript)
-        else:
-            # Formatuj do tekstowej formy
-            if format_type == 'md':
-                formatter = MarkdownFormatter()
-                result["transcript"] = formatter.format_transcript(transcript, metadata=metadata)
-            else:
-                from youtube_transcript_api.formatters import TextFormatter
-                formatter = TextFormatter()
-                result["transcript"] = formatter.format_transcript(transcript)
+            save_to_file = _save_allowed(save_to_file, deadline)
+            result["translations"] = {}
+            for language_code, transcript in translations.items():
+                rendered = {}
+                if window:
+                    transcript, rendered["range"] = _apply_range(transcript, window)
+                rendered.update(_render_transcript(
+                    transcript, video_id, metadata, format_type,
+                    save_to_file, output_dir, encode_base64, language_code,
+                    include_base64=content_mode != 'text', durable=durable, deadline=deadline
+                ))
+                result["translations"][language_code] = rendered
+            result["failed_translations"] = [code for code in translate_to if code not in translations]
+            if save_to_file:
+                result["pending_writes"] = 0 if durable else _writer.pending()
+            _report_partial(result, deadline)
+            return jsonify(_shape_response(result, fields, content_mode))
         
-        return jsonify(result)
+        # Pobierz transkrypcję
+        transcript, starts = _cached_fetch_transcript(
+            video_id=video_id,
+            languages=languages,
+            preserve_formatting=preserve_formatting,
+            translate_to=translate_to,
+            exclude_generated=exclude_generated,
+            exclude_manually_created=exclude_manually_created,
+            deadline=deadline
+        )
+        
+        if not transcript:
+            return _fetch_failed(deadline)
+        
+        save_to_file = _save_allowed(save_to_file, deadline)
+        
+        if window:
+            transcript, result["range"] = _apply_range(transcript, window, starts)
+        
+        result.update(_render_transcript(
+            transcript, video_id, metadata, format_type,
+            save_to_file, output_dir, encode_base64,
+            include_base64=content_mode != 'text', durable=durable, deadline=deadline
+        ))
+        if save_to_file:
+            result["pending_writes"] = 0 if durable else _writer.pending()
+        
+        _report_partial(result, deadline)
+        return jsonify(_shape_response(result, fields, content_mode))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/transcripts/list', methods=['POST'])
+@admission_controlled('list')
 def list_transcripts():
     """Endpoint do listowania dostępnych transkrypcji"""
     try:
@@ -146,8 +727,7 @@ def list_transcripts():
         
         video_id = get_video_id_from_url(video_id_or_url)
         
-        from youtube_transcript_api import YouTubeTranscriptApi
-        ytt_api = YouTubeTranscriptApi()
+        ytt_api = _create_transcript_api()
         transcript_list = ytt_api.list(video_id)
         
         transcripts_info = []
@@ -170,6 +750,7 @@ def list_transcripts():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/metadata', methods=['POST'])
+@admission_controlled('metadata', with_deadline=True)
 def get_video_info():
     """Endpoint do pobierania metadanych filmu"""
     try:
@@ -182,18 +763,312 @@ def get_video_info():
         if not video_id_or_url:
             return jsonify({"error": "Brak video_id lub url"}), 400
         
+        try:
+            metadata_fields = parse_metadata_fields(data.get('fields'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        deadline = g.deadline
         video_id = get_video_id_from_url(video_id_or_url)
-        metadata = get_video_metadata(video_id)
+        metadata = get_video_metadata(video_id, metadata_fields, deadline)
         
-        return jsonify({
+        result = {
             "success": True,
             "video_id": video_id,
             "metadata": metadata
+        }
+        _report_partial(result, deadline)
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/channels/sync', methods=['POST'])
+@admission_controlled('channels')
+def sync_channels_endpoint():
+    """Endpoint do przyrostowej synchronizacji kanałów (RSS + zapytania warunkowe)"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({"error": "Brak danych wejściowych"}), 400
+        
+        channels = data.get('channels')
+        if isinstance(channels, str):
+            channels = [channels]
+        if not channels:
+            return jsonify({"error": "Brak listy channels"}), 400
+        
+        from channel_sync import sync_channels
+        
+        languages = data.get('languages', ['pl', 'en'])
+        try:
+            formats = parse_output_formats(data.get('formats') or data.get('format', 'md')) or ['md']
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        output_dir = data.get('output_dir', 'Transcripts')
+        include_metadata = data.get('include_metadata', True)
+        encode_base64 = data.get('encode_base64', True)
+        
+        summary = sync_channels(
+            channels,
+            lambda video_id: bool(archive_video(
+                video_id, languages, formats, output_dir, include_metadata, encode_base64
+            )),
+            dry_run=data.get('dry_run', False)
+        )
+        
+        return jsonify({"success": True, **summary})
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _is_translation(document):
+    """Tłumaczenie zapisane z sufiksem języka (Tytuł.de.md)"""
+    stem = os.path.splitext(document['path'])[0]
+    return bool(document['language']) and stem.endswith(f".{document['language']}")
+
+
+def _archived_markdown(video_id, language=None):
+    """
+    Plik .md filmu z archiwum (wg indeksu, a w razie braku — FILES_DIR/<video_id>.md).
+    Bez language — pełna transkrypcja źródłowa (tłumaczenia tylko przy jawnym lang);
+    wycinki zakresu nigdy nie są zwracane.
+    """
+    for document in find_documents(video_id):
+        if is_slice_path(document['path']):
+            continue
+        if language:
+            if document['language'] != language:
+                continue
+        elif _is_translation(document):
+            continue
+        if os.path.isfile(document['path']):
+            return document['path']
+    
+    fallback = os.path.join(FILES_DIR, f"{video_id}.md")
+    if language:
+        fallback = with_name_suffix(fallback, language)
+    return fallback if os.path.isfile(fallback) else None
+
+
+def _archived_file(video_id, format_type, language=None):
+    """Ścieżka zapisanego artefaktu filmu lub None"""
+    if format_type in ('md', 'b64', 'notes'):
+        markdown_path = _archived_markdown(video_id, language)
+        if not markdown_path:
+            return None
+        path = {
+            'md': markdown_path,
+            'b64': base64_path_for(markdown_path),
+            'notes': notes_path_for(markdown_path),
+        }[format_type]
+    else:
+        path = os.path.join(FILES_DIR, f"{video_id}.{format_type}")
+        if language:
+            path = with_name_suffix(path, language)
+    return path if os.path.isfile(path) else None
+
+
+def _content_etag(path):
+    """Silny ETag z treści pliku (przeliczany tylko, gdy plik się zmienił)"""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    with _etag_cache_lock:
+        etag = _etag_cache.get(key)
+        if etag:
+            _etag_cache.move_to_end(key)
+            return etag
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    etag = digest.hexdigest()
+    
+    with _etag_cache_lock:
+        _etag_cache[key] = etag
+        while len(_etag_cache) > ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return etag
+
+
+@app.route('/files/<name>', methods=['GET', 'HEAD'])
+def get_archived_file(name):
+    """Zapisany plik prosto z dysku (ETag, 304, zakresy bajtów), bez ponownego pobierania z YouTube"""
+    video_id, _, format_type = name.partition('.')
+    format_type = format_type or 'md'
+    language = request.args.get('lang')
+    
+    if not _VIDEO_ID_PATTERN.match(video_id):
+        return jsonify({"error": "Nieprawidłowe video_id"}), 400
+    if format_type not in FILE_MIMETYPES:
+        return jsonify({"error": f"format musi mieć jedną z wartości: {', '.join(FILE_MIMETYPES)}"}), 400
+    if language and not re.match(r'^[A-Za-z0-9_-]{1,20}$', language):
+        return jsonify({"error": "Nieprawidłowy kod języka"}), 400
+    
+    path = _archived_file(video_id, format_type, language)
+    if not path:
+        return jsonify({"error": f"Brak zapisanego pliku {format_type} dla {video_id}"}), 404
+    
+    return send_file(
+        os.path.abspath(path),
+        mimetype=FILE_MIMETYPES[format_type],
+        download_name=os.path.basename(path),
+        conditional=True,
+        etag=_content_etag(path)
+    )
+
+@app.route('/search', methods=['GET'])
+def search_transcripts():
+    """Wyszukiwanie pełnotekstowe w zarchiwizowanych transkrypcjach"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Brak parametru q"}), 400
+        
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+        raw = request.args.get('raw', 'false').lower() == 'true'
+        
+        started = time.perf_counter()
+        try:
+            results = search_index(query, limit=limit, raw=raw)
+        except sqlite3.OperationalError as e:
+            return jsonify({"error": f"Nieprawidłowe zapytanie: {e}"}), 400
+        
+        return jsonify({
+            "success": True,
+            "query": query,
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2)
         })
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _inside_files_dir(path):
+    """Czy ścieżka leży w katalogu archiwum (FILES_DIR) — /notes nie czyta ani nie zapisuje plików poza nim"""
+    base = os.path.realpath(FILES_DIR)
+    resolved = os.path.realpath(path)
+    return os.path.commonpath([base, resolved]) == base
+
+
+@app.route('/notes', methods=['POST'])
+@admission_controlled('notes')
+def create_notes_endpoint():
+    """Endpoint do generowania notatek (Gemini) — bez interakcji, ze strumieniowaniem"""
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"error": "Brak danych wejściowych"}), 400
+
+        note_type = data.get('note_type', 'bullet')
+        if note_type not in ('continuous', 'bullet'):
+            return jsonify({"error": "note_type musi mieć wartość 'continuous' lub 'bullet'"}), 400
+
+        include_checklist = bool(data.get('include_checklist', False))
+        save_to_file = data.get('save_to_file', True)
+        stream = data.get('stream', True)
+        output_path = data.get('output_path')
+        use_cache = data.get('cache', True)
+
+        transcript_content = data.get('transcript')
+        transcript_file = data.get('transcript_file')
+        video_id_or_url = data.get('video_id') or data.get('url')
+
+        if transcript_file:
+            if not _inside_files_dir(transcript_file):
+                return jsonify({"error": f"transcript_file musi leżeć w katalogu {FILES_DIR}"}), 400
+            if not os.path.isfile(transcript_file):
+                return jsonify({"error": f"Nie znaleziono pliku: {transcript_file}"}), 404
+            with open(transcript_file, 'r', encoding='utf-8') as f:
+                transcript_content = f.read()
+        elif not transcript_content and video_id_or_url:
+            # Pobierz transkrypcję i sformatuj do Markdown
+            video_id = get_video_id_from_url(video_id_or_url)
+            metadata = get_video_metadata(video_id)
+            transcript = fetch_transcript(
+                video_id=video_id,
+                languages=data.get('languages', ['pl', 'en'])
+            )
+            if not transcript:
+                return jsonify({"error": "Nie udało się pobrać transkrypcji"}), 404
+            transcript_content = MarkdownFormatter().format_transcript(transcript, metadata=metadata)
+            transcript_file = os.path.join(
+                data.get('output_dir', 'Transcripts'),
+                f"{sanitize_filename(metadata['title'])}.md"
+            )
+
+        if not transcript_content or not transcript_content.strip():
+            return jsonify({"error": "Brak transkrypcji (transcript, transcript_file lub video_id)"}), 400
+
+        if not save_to_file:
+            output_path = None
+        elif not output_path and transcript_file:
+            output_path = notes_path_for(transcript_file)
+        
+        if output_path and not _inside_files_dir(output_path):
+            return jsonify({"error": f"output_path musi leżeć w katalogu {FILES_DIR}"}), 400
+
+        # Zwięzła reprezentacja transkrypcji dla LLM (mniej tokenów, krótszy czas odpowiedzi)
+        compaction = None
+        if data.get('compact', True):
+            transcript_content, compaction = compact_markdown(transcript_content)
+
+        # Trafienie w pamięci podręcznej notatek nie wymaga klucza API ani modelu
+        cache_hit = use_cache and cached_notes(transcript_content, note_type, include_checklist) is not None
+
+        # Model tworzony raz na proces — bez zapytania testowego przed generowaniem
+        model = None
+        if not cache_hit:
+            try:
+                model = get_model()
+            except RuntimeError as e:
+                return jsonify({"error": str(e)}), 503
+
+        if stream:
+            chunks = stream_notes(
+                transcript_content, note_type, include_checklist, output_path, model,
+                compact=False, use_cache=use_cache
+            )
+            # Pierwszy fragment przed wysłaniem nagłówków — błędny klucz API lub błąd modelu
+            # kończą się kodem 502, a nie urwanym strumieniem po 200
+            try:
+                first_chunk = next(chunks, None)
+            except Exception as e:
+                return jsonify({"error": f"Błąd generowania notatek: {e}"}), 502
+            if first_chunk is not None:
+                chunks = itertools.chain([first_chunk], chunks)
+            response = Response(stream_with_context(chunks), mimetype='text/markdown; charset=utf-8')
+            response.headers['X-Accel-Buffering'] = 'no'
+            response.headers['X-Notes-Cache'] = 'hit' if cache_hit else 'miss'
+            if output_path:
+                response.headers['X-Notes-File'] = output_path
+            if compaction:
+                response.headers['X-Tokens-Saved'] = str(compaction['saved_tokens'])
+            return response
+
+        notes = create_notes(
+            transcript_content, note_type, include_checklist, output_path, model,
+            compact=False, use_cache=use_cache
+        )
+        result = {
+            "success": True,
+            "note_type": note_type,
+            "include_checklist": include_checklist,
+            "cached": cache_hit,
+            "notes": notes
+        }
+        if compaction:
+            result["compaction"] = compaction
+        if output_path:
+            result["saved_to"] = output_path
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == '__main__':
     # Uruchom serwer
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark czasu importu (python -X importtime) z budżetem.
+
+Dla każdej ścieżki startowej uruchamia świeży interpreter kilka razy, bierze
+najlepszy (najmniej zaszumiony) wynik skumulowanego czasu importu modułów
+projektu i porównuje go z budżetem. Liczone są tylko linie `import` samych
+modułów docelowych (z ich zależnościami) — start interpretera i moduły site
+nie wchodzą do wyniku, więc ich szum nie zasłania regresji. Bytecode trafia do
+tymczasowego PYTHONPYCACHEPREFIX, a pierwszy (rozgrzewkowy) przebieg jest
+pomijany — na czystym checkoucie bez __pycache__ mierzony jest import, nie
+kompilacja źródeł. Dodatkowo sprawdza, że ścieżka nie ładuje zależności,
+których nie potrzebuje (np. bs4 przy samym imporcie modułu CLI).
+
+Kończy się kodem 1, jeśli którykolwiek budżet został przekroczony — można go
+podpiąć do CI:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --scale 2     # wolniejsza maszyna CI
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (nazwa, moduły importowane w świeżym interpreterze, budżet w ms, moduły zabronione)
+CASES = [
+    (
+        "cli: import youtube_transcript_downloader",
+        ["youtube_transcript_downloader"],
+        15,
+        ["bs4", "requests", "youtube_transcript_api", "concurrent.futures", "google.generativeai"],
+    ),
+    (
+        "cli: --search path",
+        ["youtube_transcript_downloader", "transcript_index"],
+        25,
+        ["bs4", "requests", "youtube_transcript_api", "google.generativeai"],
+    ),
+    (
+        "notes: import notes_agent",
+        ["notes_agent"],
+        50,
+        ["google.generativeai", "bs4"],
+    ),
+]
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def measure(targets: List[str], pycache_dir: str) -> Tuple[float, List[str]]:
+    """Zwraca (skumulowany czas importu modułów docelowych w ms, lista zaimportowanych modułów)"""
+    code = f"import {', '.join(targets)}"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPYCACHEPREFIX": pycache_dir, "PYTHONDONTWRITEBYTECODE": ""},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"'{code}' zakończył się błędem:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        modules.append(match.group(4))
+        # Linie najwyższego poziomu (bez wcięcia) modułów docelowych — czas skumulowany
+        # obejmuje ich zależności, a kolejne cele nie liczą drugi raz tego, co już załadowane
+        if len(match.group(3)) == 1 and match.group(4) in targets:
+            total_us += int(match.group(2))
+
+    return total_us / 1000.0, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark czasu importu z budżetem")
+    parser.add_argument("--runs", type=int, default=5, help="Liczba powtórzeń (bierzemy najlepszy wynik)")
+    parser.add_argument("--scale", type=float, default=float(os.environ.get("IMPORT_BUDGET_SCALE", 1.0)),
+                        help="Mnożnik budżetów (np. 2 dla wolnych maszyn CI)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="import-time-pycache-") as pycache_dir:
+        return run_cases(args.runs, args.scale, pycache_dir)
+
+
+def run_cases(runs: int, scale: float, pycache_dir: str) -> int:
+    failed = False
+    for name, targets, budget, forbidden in CASES:
+        # Rozgrzewka: kompilacja do pycache_dir, wynik pomijany
+        measure(targets, pycache_dir)
+        results: Dict[float, List[str]] = {}
+        for _ in range(runs):
+            total, modules = measure(targets, pycache_dir)
+            results[total] = modules
+        elapsed = min(results)
+        limit = budget * scale
+
+        leaked = [module for module in forbidden if module in results[elapsed]]
+        ok = elapsed <= limit and not leaked
+        failed = failed or not ok
+
+        status = "OK  " if ok else "FAIL"
+        print(f"[{status}] {name}: {elapsed:.1f} ms (budżet {limit:.0f} ms)")
+        if leaked:
+            print(f"       niepotrzebnie zaimportowane: {', '.join(leaked)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
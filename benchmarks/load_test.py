@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Test obciążeniowy API (api_server.py) bez dotykania prawdziwego YouTube.
+
+Uruchamia lokalny stub YouTube (benchmarks/youtube_stub.py), startuje
+api_server.py jako osobny proces z YOUTUBE_BASE_URL wskazującym na stub,
+a potem przez zadany czas wysyła żądania do /transcript, /metadata
+i /transcripts/list z zadaną współbieżnością. Raportuje przepustowość,
+opóźnienia p50/p95/p99, kody odpowiedzi i pamięć (RSS) procesu API.
+
+    python benchmarks/load_test.py --concurrency 16 --duration 30
+    python benchmarks/load_test.py --endpoints transcript --latency-ms 200 --error-rate 0.02
+    python benchmarks/load_test.py --api-url http://127.0.0.1:5000   # już działający serwer
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from youtube_stub import add_stub_arguments, config_from_args, start_stub
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = {
+    "transcript": ("POST", "/transcript"),
+    "metadata": ("POST", "/metadata"),
+    "list": ("POST", "/transcripts/list"),
+}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentyl metodą najbliższej rangi"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Pamięć rezydentna procesu (Linux /proc, w innym wypadku psutil jeśli jest)"""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024.0 * 1024.0)
+    except Exception:
+        return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(stub_url: str, port: int, env_overrides: Dict[str, str]) -> subprocess.Popen:
+    """Uruchom api_server.py z YOUTUBE_BASE_URL na stub i poczekaj na /health"""
+    env = {**os.environ, "YOUTUBE_BASE_URL": stub_url, "PORT": str(port), "DEBUG": "false", **env_overrides}
+    proc = subprocess.Popen(
+        [sys.executable, "api_server.py"],
+        cwd=PROJECT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/health"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"api_server.py zakończył się kodem {proc.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("api_server.py nie odpowiedział na /health w ciągu 30 s")
+
+
+def request_body(endpoint: str, video_id: str, save_to_file: bool) -> Dict[str, Any]:
+    if endpoint == "transcript":
+        return {"video_id": video_id, "languages": ["en"], "save_to_file": save_to_file}
+    return {"video_id": video_id}
+
+
+def run_load(
+    api_url: str,
+    endpoints: List[str],
+    concurrency: int,
+    duration: float,
+    videos: int,
+    save_to_file: bool,
+    timeout: float,
+    api_pid: Optional[int] = None
+) -> Dict[str, Any]:
+    """Wysyłaj żądania przez `duration` sekund z `concurrency` wątków; zwraca raport"""
+    video_ids = [f"stub{i:07d}" for i in range(videos)]
+    lock = threading.Lock()
+    latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in endpoints}
+    statuses: Dict[str, Dict[str, int]] = {endpoint: {} for endpoint in endpoints}
+    memory: List[float] = []
+    stop = threading.Event()
+
+    def sample_memory() -> None:
+        while not stop.is_set():
+            value = rss_mb(api_pid) if api_pid else None
+            if value is not None:
+                memory.append(value)
+            stop.wait(0.5)
+
+    def worker(worker_id: int) -> None:
+        session = requests.Session()
+        rng = random.Random(worker_id)
+        end = time.monotonic() + duration
+        i = worker_id
+        while time.monotonic() < end:
+            endpoint = endpoints[i % len(endpoints)]
+            i += 1
+            method, path = ENDPOINTS[endpoint]
+            body = request_body(endpoint, rng.choice(video_ids), save_to_file)
+            started = time.perf_counter()
+            try:
+                response = session.request(method, api_url + path, json=body, timeout=timeout)
+                status = str(response.status_code)
+            except requests.RequestException as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            with lock:
+                latencies[endpoint].append(elapsed_ms)
+                statuses[endpoint][status] = statuses[endpoint].get(status, 0) + 1
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    wall = time.monotonic() - started
+    stop.set()
+    sampler.join()
+
+    report: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "duration_seconds": round(wall, 2),
+        "endpoints": {},
+    }
+    all_latencies: List[float] = []
+    total_ok = 0
+    for endpoint in endpoints:
+        values = latencies[endpoint]
+        ok = statuses[endpoint].get("200", 0)
+        total_ok += ok
+        all_latencies.extend(values)
+        report["endpoints"][endpoint] = {
+            "requests": len(values),
+            "ok": ok,
+            "statuses": statuses[endpoint],
+            "throughput_rps": round(ok / wall, 2) if wall else 0.0,
+            "p50_ms": _round(percentile(values, 50)),
+            "p95_ms": _round(percentile(values, 95)),
+            "p99_ms": _round(percentile(values, 99)),
+        }
+    report["total"] = {
+        "requests": len(all_latencies),
+        "ok": total_ok,
+        "throughput_rps": round(total_ok / wall, 2) if wall else 0.0,
+        "p50_ms": _round(percentile(all_latencies, 50)),
+        "p95_ms": _round(percentile(all_latencies, 95)),
+        "p99_ms": _round(percentile(all_latencies, 99)),
+    }
+    report["api_rss_mb"] = {
+        "peak": _round(max(memory)) if memory else None,
+        "final": _round(memory[-1]) if memory else None,
+    }
+    return report
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\nWspółbieżność: {report['concurrency']}, czas: {report['duration_seconds']} s")
+    print(f"{'endpoint':<12} {'żądania':>8} {'ok':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  statusy")
+    rows = list(report["endpoints"].items()) + [("RAZEM", report["total"])]
+    for name, row in rows:
+        statuses = ", ".join(f"{code}: {count}" for code, count in sorted(row.get("statuses", {}).items()))
+        print(f"{name:<12} {row['requests']:>8} {row['ok']:>7} {row['throughput_rps']:>8} "
+              f"{_fmt(row['p50_ms']):>8} {_fmt(row['p95_ms']):>8} {_fmt(row['p99_ms']):>8}  {statuses}")
+    memory = report["api_rss_mb"]
+    if memory["peak"] is not None:
+        print(f"\nPamięć procesu API (RSS): szczyt {memory['peak']} MB, na koniec {memory['final']} MB")
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Test obciążeniowy API z lokalnym stubem YouTube")
+    parser.add_argument("--endpoints", default="transcript,metadata,list",
+                        help=f"Endpointy oddzielone przecinkami ({', '.join(ENDPOINTS)})")
+    parser.add_argument("--concurrency", type=int, default=8, help="Liczba równoległych klientów")
+    parser.add_argument("--duration", type=float, default=20.0, help="Czas trwania testu (s)")
+    parser.add_argument("--videos", type=int, default=50,
+                        help="Liczba różnych filmów (mniej = więcej trafień w pamięć podręczną)")
+    parser.add_argument("--save-to-file", action="store_true", help="Zapisuj pliki (/transcript save_to_file)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout pojedynczego żądania (s)")
+    parser.add_argument("--api-url", help="Użyj działającego serwera API zamiast uruchamiać własny")
+    parser.add_argument("--api-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Zmienna środowiskowa dla uruchamianego API (np. TRANSCRIPT_MAX_IN_FLIGHT=16)")
+    parser.add_argument("--json", action="store_true", help="Wypisz raport jako JSON")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(',') if endpoint.strip()]
+    unknown = [endpoint for endpoint in endpoints if endpoint not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Nieznane endpointy: {', '.join(unknown)}")
+
+    api_proc = None
+    stub = None
+    try:
+        if args.api_url:
+            api_url = args.api_url.rstrip('/')
+        else:
+            stub = start_stub(config=config_from_args(args))
+            stub_url = f"http://127.0.0.1:{stub.server_port}"
+            port = free_port()
+            env_overrides = dict(item.split('=', 1) for item in args.api_env)
+            api_proc = start_api(stub_url, port, env_overrides)
+            api_url = f"http://127.0.0.1:{port}"
+            print(f"Stub YouTube: {stub_url}, API: {api_url} (pid {api_proc.pid})")
+
+        report = run_load(
+            api_url, endpoints, args.concurrency, args.duration, args.videos,
+            args.save_to_file, args.timeout, api_proc.pid if api_proc else None
+        )
+        if stub is not None:
+            report["stub"] = {"requests": stub.RequestHandlerClass.config.requests,
+                              "injected_errors": stub.RequestHandlerClass.config.errors}
+    finally:
+        if api_proc is not None:
+            api_proc.terminate()
+            api_proc.wait(timeout=10)
+        if stub is not None:
+            stub.shutdown()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
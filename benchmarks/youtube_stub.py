@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Lokalny zamiennik YouTube do testów obciążeniowych.
+
+Serwuje wszystko, czego używają youtube_transcript_downloader i
+youtube_transcript_api: stronę filmu (/watch), odpowiedź Innertube z listą
+napisów (/youtubei/v1/player), same napisy (/api/timedtext), oEmbed
+(/oembed) i kanał RSS (/feeds/videos.xml). Opóźnienie i błędy są
+konfigurowalne, a zamiast syntetycznej strony filmu i napisów można podać
+nagrane (--watch-page, --timedtext), żeby parsowanie HTML i XML kosztowało
+tyle, co naprawdę.
+
+Uruchomienie samodzielne:
+
+    python benchmarks/youtube_stub.py --port 8765 --latency-ms 150 --error-rate 0.01
+    YOUTUBE_BASE_URL=http://127.0.0.1:8765 python api_server.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+INNERTUBE_API_KEY = "stub-innertube-key"
+
+
+class StubConfig:
+    """Parametry stubu wspólne dla wszystkich wątków serwera"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        segments: int = 600,
+        page_kb: int = 600,
+        watch_page: Optional[str] = None,
+        timedtext: Optional[str] = None,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.segments = segments
+        self.page_kb = page_kb
+        self.watch_page = watch_page
+        self.timedtext = timedtext
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+
+
+def _video_title(video_id: str) -> str:
+    return f"Stub video {video_id}"
+
+
+def render_watch_page(video_id: str, config: StubConfig) -> str:
+    """Strona filmu z tym, czego szukają parsery (meta tagi, klucz Innertube, ytInitialData)"""
+    if config.watch_page:
+        with open(config.watch_page, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    title = escape(_video_title(video_id))
+    initial_data = {
+        "contents": {"twoColumnWatchNextResults": {"results": {"results": {"contents": [
+            {"videoSecondaryInfoRenderer": {"attributedDescription": {
+                "content": f"Opis filmu {video_id}.\n" + "Linia opisu. " * 40
+            }}}
+        ]}}}}
+    }
+    # Wypełnienie do rozmiaru zbliżonego do prawdziwej strony (~0.5–1 MB)
+    padding = "<!-- " + ("x" * 1000 + "\n") * max(0, config.page_kb) + " -->"
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{title} - YouTube</title>"
+        f'<meta property="og:title" content="{title}">'
+        f'<meta property="og:description" content="Opis filmu {video_id}">'
+        f'<meta property="og:image" content="https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg">'
+        '<meta itemprop="interactionCount" content="12345">'
+        '<meta itemprop="datePublished" content="2024-01-01">'
+        '<link itemprop="name" content="Stub Channel">'
+        "</head><body>"
+        f'<script>var ytcfg = {{"INNERTUBE_API_KEY": "{INNERTUBE_API_KEY}"}};</script>'
+        f"<script>var ytInitialData = {json.dumps(initial_data)};</script>"
+        f"{padding}</body></html>"
+    )
+
+
+def render_player_response(video_id: str, base_url: str) -> Dict[str, Any]:
+    """Odpowiedź Innertube /player z jedną ścieżką ręczną (en) i jedną automatyczną (pl)"""
+    def track(language_code: str, name: str, kind: Optional[str]) -> Dict[str, Any]:
+        caption = {
+            "baseUrl": f"{base_url}/api/timedtext?v={video_id}&lang={language_code}",
+            "name": {"runs": [{"text": name}]},
+            "languageCode": language_code,
+            "isTranslatable": True,
+        }
+        if kind:
+            caption["kind"] = kind
+        return caption
+
+    return {
+        "playabilityStatus": {"status": "OK"},
+        "captions": {"playerCaptionsTracklistRenderer": {
+            "captionTracks": [track("en", "English", None), track("pl", "Polish (auto-generated)", "asr")],
+            "translationLanguages": [
+                {"languageCode": code, "languageName": {"runs": [{"text": code}]}}
+                for code in ("de", "fr", "es", "pl", "en")
+            ],
+        }},
+    }
+
+
+def render_timedtext(video_id: str, language_code: str, segments: int, recorded: Optional[str] = None) -> str:
+    """Napisy w formacie timedtext (XML) — nagrane z pliku lub syntetyczne"""
+    if recorded:
+        with open(recorded, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    lines = ['<?xml version="1.0" encoding="utf-8" ?><transcript>']
+    for i in range(segments):
+        lines.append(
+            f'<text start="{i * 2.5:.2f}" dur="2.5">[{language_code}] segment {i} filmu {escape(video_id)}, '
+            "kilka słów przykładowego tekstu napisów.</text>"
+        )
+    lines.append("</transcript>")
+    return "".join(lines)
+
+
+def render_feed(channel_id: str) -> str:
+    entries = "".join(
+        f"<entry><yt:videoId>{channel_id[-6:]}v{i:04d}</yt:videoId><title>Film {i}</title>"
+        f"<published>2024-01-{i + 1:02d}T00:00:00+00:00</published></entry>"
+        for i in range(15)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:yt="http://www.youtube.com/xml/schemas/2015">'
+        f"{entries}</feed>"
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "YouTubeStub/1.0"
+    protocol_version = "HTTP/1.1"
+    config: StubConfig
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay_and_maybe_fail(self, route: str) -> bool:
+        config = self.config
+        with config.lock:
+            config.requests[route] = config.requests.get(route, 0) + 1
+            delay = max(0.0, config.latency_ms + config.random.uniform(-config.jitter_ms, config.jitter_ms))
+            fail = config.random.random() < config.error_rate
+            if fail:
+                config.errors += 1
+        if delay:
+            time.sleep(delay / 1000.0)
+        if fail:
+            self._send(config.error_status, "text/plain", "injected error")
+        return fail
+
+    def _send(self, status: int, content_type: str, body: str) -> None:
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _base_url(self) -> str:
+        return f"http://{self.headers.get('Host')}"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        if parsed.path == "/watch":
+            if not self._delay_and_maybe_fail("watch"):
+                self._send(200, "text/html", render_watch_page(query.get("v", ""), self.config))
+        elif parsed.path == "/api/timedtext":
+            if not self._delay_and_maybe_fail("timedtext"):
+                language_code = query.get("tlang") or query.get("lang", "en")
+                self._send(200, "text/xml", render_timedtext(
+                    query.get("v", ""), language_code, self.config.segments, self.config.timedtext
+                ))
+        elif parsed.path == "/oembed":
+            if not self._delay_and_maybe_fail("oembed"):
+                video_id = parse_qs(urlparse(query.get("url", "")).query).get("v", [""])[0]
+                self._send(200, "application/json", json.dumps({
+                    "title": _video_title(video_id),
+                    "author_name": "Stub Channel",
+                    "thumbnail_url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+                }))
+        elif parsed.path == "/feeds/videos.xml":
+            if not self._delay_and_maybe_fail("feed"):
+                self._send(200, "application/atom+xml", render_feed(query.get("channel_id", "")))
+        else:
+            self._send(404, "text/plain", "not found")
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if parsed.path == "/youtubei/v1/player":
+            if not self._delay_and_maybe_fail("player"):
+                payload = render_player_response(body.get("videoId", ""), self._base_url())
+                self._send(200, "application/json", json.dumps(payload))
+        else:
+            self._send(404, "text/plain", "not found")
+
+
+def start_stub(host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """Uruchom stub w wątku w tle; adres: http://host:server.server_port"""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config or StubConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="youtube-stub", daemon=True).start()
+    return server
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Opóźnienie każdej odpowiedzi stubu")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Losowy rozrzut opóźnienia (±)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Odsetek odpowiedzi z błędem (0–1)")
+    parser.add_argument("--error-status", type=int, default=500, help="Kod błędu (np. 500, 429)")
+    parser.add_argument("--segments", type=int, default=600, help="Liczba segmentów napisów na film")
+    parser.add_argument("--page-kb", type=int, default=600, help="Rozmiar syntetycznej strony filmu (KB)")
+    parser.add_argument("--watch-page", help="Nagrana strona filmu (HTML) zamiast syntetycznej")
+    parser.add_argument("--timedtext", help="Nagrane napisy (XML z /api/timedtext) zamiast syntetycznych")
+    parser.add_argument("--seed", type=int, help="Ziarno losowania (powtarzalne opóźnienia i błędy)")
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        segments=args.segments,
+        page_kb=args.page_kb,
+        watch_page=args.watch_page,
+        timedtext=args.timedtext,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lokalny zamiennik YouTube do testów obciążeniowych")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_stub(args.host, args.port, config_from_args(args))
+    print(f"Stub YouTube: http://{args.host}:{server.server_port} (Ctrl+C kończy)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Przyrostowa synchronizacja kanałów YouTube.
+
+Zamiast pobierać stronę każdego filmu, odpytuje lekki kanał RSS z ostatnimi
+filmami kanału (kilka KB) z nagłówkami warunkowymi (ETag / Last-Modified).
+Stan synchronizacji (ETag, Last-Modified, znane filmy) jest trzymany lokalnie,
+więc kanał bez nowych filmów kosztuje jedno zapytanie z odpowiedzią 304.
+Do dalszego przetwarzania trafiają tylko filmy, których nie ma jeszcze w archiwum.
+"""
+
+import json
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+SYNC_STATE_PATH = os.environ.get('CHANNEL_SYNC_STATE', os.path.join('Transcripts', '.channel_sync.json'))
+
+# Ile ostatnio widzianych filmów pamiętać na kanał (kanał RSS zwraca ~15 najnowszych)
+SEEN_LIMIT = 200
+
+_NS = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'yt': 'http://www.youtube.com/xml/schemas/2015',
+}
+_CHANNEL_ID = re.compile(r'(UC[A-Za-z0-9_-]{22})')
+
+
+def parse_channel_id(value: str) -> str:
+    """Wyodrębnij ID kanału (UC...) z ID lub URL youtube.com/channel/UC..."""
+    match = _CHANNEL_ID.search(value)
+    if not match:
+        raise ValueError(f"Nieprawidłowe ID kanału (oczekiwano UC... lub URL /channel/UC...): {value}")
+    return match.group(1)
+
+
+def load_state(state_path: Optional[str] = None) -> Dict[str, Any]:
+    """Wczytaj stan synchronizacji (pusty, jeśli plik nie istnieje)"""
+    state_path = state_path or SYNC_STATE_PATH
+    if not os.path.exists(state_path):
+        return {"channels": {}}
+    with open(state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state: Dict[str, Any], state_path: Optional[str] = None) -> None:
+    """Zapisz stan atomowo (plik tymczasowy + rename)"""
+    state_path = state_path or SYNC_STATE_PATH
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def parse_feed(xml_content: bytes) -> List[Dict[str, str]]:
+    """Rozbierz kanał Atom na listę filmów (video_id, title, published)"""
+    root = ET.fromstring(xml_content)
+    videos = []
+    for entry in root.findall('atom:entry', _NS):
+        video_id = entry.findtext('yt:videoId', default='', namespaces=_NS)
+        if not video_id:
+            continue
+        videos.append({
+            "video_id": video_id,
+            "title": entry.findtext('atom:title', default='', namespaces=_NS),
+            "published": entry.findtext('atom:published', default='', namespaces=_NS),
+        })
+    return videos
+
+
+def fetch_feed(channel_id: str, channel_state: Dict[str, Any], timeout: float = 10) -> Tuple[int, List[Dict[str, str]]]:
+    """
+    Pobierz kanał RSS z nagłówkami warunkowymi i zaktualizuj channel_state (ETag, Last-Modified).
+
+    Returns:
+        Krotka (kod HTTP, lista filmów); dla 304 lista jest pusta
+    """
+    import requests
+    from youtube_transcript_downloader import youtube_url
+
+    headers = {}
+    if channel_state.get('etag'):
+        headers['If-None-Match'] = channel_state['etag']
+    if channel_state.get('last_modified'):
+        headers['If-Modified-Since'] = channel_state['last_modified']
+
+    response = requests.get(youtube_url(FEED_URL.format(channel_id=channel_id)), headers=headers, timeout=timeout)
+    channel_state['last_checked'] = time.time()
+
+    if response.status_code == 304:
+        return 304, []
+
+    response.raise_for_status()
+    channel_state['etag'] = response.headers.get('ETag')
+    channel_state['last_modified'] = response.headers.get('Last-Modified')
+    return response.status_code, parse_feed(response.content)
+
+
+def archived_video_ids() -> Set[str]:
+    """ID filmów, które są już w archiwum (wg indeksu wyszukiwania)"""
+    try:
+        from transcript_index import indexed_video_ids
+        return indexed_video_ids()
+    except Exception as e:
+        print(f"Błąd podczas odczytu indeksu archiwum: {e}")
+        return set()
+
+
+def sync_channels(
+    channels: List[str],
+    process_video: Callable[[str], bool],
+    state_path: Optional[str] = None,
+    poll_workers: int = 8,
+    process_workers: int = 2,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Odpytaj kanały i przekaż nowe filmy do process_video.
+
+    Args:
+        channels: ID kanałów lub URL-e /channel/UC...
+        process_video: Funkcja(video_id) -> True jeśli film został zarchiwizowany
+        dry_run: Tylko wykryj nowe filmy, bez przetwarzania i bez zapisu stanu
+
+    Returns:
+        Podsumowanie: liczba kanałów, 304, nowe/przetworzone/nieudane filmy, błędy kanałów
+    """
+    state = load_state(state_path)
+    channel_states = state.setdefault("channels", {})
+    summary = {
+        "channels": 0,
+        "not_modified": 0,
+        "new_videos": [],
+        "processed": [],
+        "failed": [],
+        "errors": {},
+    }
+
+    channel_ids = []
+    for value in channels:
+        try:
+            channel_ids.append(parse_channel_id(value))
+        except ValueError as e:
+            summary["errors"][value] = str(e)
+    channel_ids = list(dict.fromkeys(channel_ids))
+    summary["channels"] = len(channel_ids)
+
+    def poll(channel_id: str):
+        channel_state = channel_states.setdefault(channel_id, {})
+        try:
+            return channel_id, fetch_feed(channel_id, channel_state), None
+        except Exception as e:
+            return channel_id, (None, []), str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(poll_workers, len(channel_ids) or 1))) as executor:
+        polled = list(executor.map(poll, channel_ids))
+
+    archived = archived_video_ids()
+    queue = []
+    for channel_id, (status, videos), error in polled:
+        channel_state = channel_states[channel_id]
+        if error:
+            summary["errors"][channel_id] = error
+        if status == 304:
+            summary["not_modified"] += 1
+
+        seen = list(channel_state.get("seen", []))
+        # Filmy, których nie udało się przetworzyć wcześniej, są ponawiane mimo 304
+        candidates = list(channel_state.get("pending", []))
+        for video in reversed(videos):
+            if video["video_id"] not in seen and video["video_id"] not in candidates:
+                candidates.append(video["video_id"])
+
+        for video_id in candidates:
+            if video_id in archived:
+                seen.append(video_id)
+            else:
+                queue.append((channel_id, video_id))
+        channel_state["seen"] = seen[-SEEN_LIMIT:]
+        channel_state["pending"] = []
+
+    summary["new_videos"] = [video_id for _, video_id in queue]
+    if dry_run:
+        return summary
+
+    def process(item):
+        channel_id, video_id = item
+        try:
+            return channel_id, video_id, bool(process_video(video_id))
+        except Exception as e:
+            print(f"Błąd podczas przetwarzania {video_id}: {e}")
+            return channel_id, video_id, False
+
+    with ThreadPoolExecutor(max_workers=max(1, process_workers)) as executor:
+        for channel_id, video_id, ok in executor.map(process, queue):
+            channel_state = channel_states[channel_id]
+            if ok:
+                summary["processed"].append(video_id)
+                channel_state["seen"] = (channel_state["seen"] + [video_id])[-SEEN_LIMIT:]
+            else:
+                summary["failed"].append(video_id)
+                channel_state["pending"].append(video_id)
+
+    save_state(state, state_path)
+    return summary
+
+
+def read_channels_file(path: str) -> List[str]:
+    """Lista kanałów z pliku (jeden na linię, # rozpoczyna komentarz)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.split('#', 1)[0].strip() for line in f]
+    return [line for line in lines if line]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Deadline żądania przekazywany przez wszystkie etapy pobierania.
+
+Zamiast osobnych, stałych timeoutów na każde zapytanie (albo ich braku),
+każdy etap dostaje tyle czasu, ile zostało do końca żądania. Etapy
+opcjonalne (pełny opis filmu, tłumaczenie, dodatkowe formaty) są pomijane,
+gdy czasu jest za mało — a pominięte pola są zapisywane w `partial`, żeby
+odpowiedź mogła powiedzieć, czego brakuje.
+"""
+
+import threading
+import time
+from typing import List, Optional
+
+
+class DeadlineExceeded(Exception):
+    """Czas na obsługę żądania minął przed zakończeniem etapu"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Przekroczono czas żądania (etap: {stage})")
+        self.stage = stage
+
+
+class Deadline:
+    """Termin zakończenia żądania; Deadline(None) nie ogranicza czasu"""
+
+    # Najkrótszy sensowny timeout pojedynczego zapytania sieciowego
+    MIN_TIMEOUT = 0.05
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self._expires_at = time.monotonic() + budget_ms / 1000.0 if budget_ms is not None else None
+        self._lock = threading.Lock()
+        self.partial: List[str] = []
+
+    @classmethod
+    def from_ms(cls, value) -> "Deadline":
+        """Deadline z parametru deadline_ms (None/brak = bez limitu); ValueError dla złych wartości"""
+        if value is None:
+            return cls()
+        budget_ms = float(value)
+        if not budget_ms > 0:
+            raise ValueError("deadline_ms musi być dodatnie")
+        return cls(budget_ms)
+
+    @property
+    def limited(self) -> bool:
+        return self._expires_at is not None
+
+    def remaining(self) -> Optional[float]:
+        """Pozostały czas w sekundach (None = bez limitu)"""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def allows(self, seconds: float) -> bool:
+        """Czy zostało co najmniej `seconds` — do decyzji o etapach opcjonalnych"""
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    def timeout(self, default: float, fraction: float = 1.0) -> float:
+        """Timeout etapu: domyślny, ale nie dłuższy niż `fraction` pozostałego czasu"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return max(self.MIN_TIMEOUT, min(default, remaining * fraction))
+
+    def check(self, stage: str) -> None:
+        if self.expired():
+            raise DeadlineExceeded(stage)
+
+    def mark_partial(self, field: str) -> None:
+        """Zapisz pole, które zostało pominięte lub jest niepełne z braku czasu"""
+        with self._lock:
+            if field not in self.partial:
+                self.partial.append(field)
@@ -4,9 +4,13 @@ Agent do generowania notatek z transkrypcji YouTube za pomocą Gemini API.
 """
 
 import os
+import re
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterator, List, Optional, Tuple
 
 try:
     from dotenv import load_dotenv
@@ -14,6 +18,12 @@ except ImportError:
     print("❌ Brak pakietu python-dotenv. Zainstaluj: pip install python-dotenv")
     sys.exit(1)
 
+import notes_cache
+from transcript_compactor import compact_markdown
+
+
+GEMINI_MODEL = 'gemini-2.0-flash'
+
 
 # ─── API Key Management ────────────────────────────────────────────────────────
 
@@ -22,18 +32,24 @@ def _get_env_path() -> Path:
     return Path(__file__).resolve().parent / '.env'
 
 
+def load_api_key() -> Optional[str]:
+    """Zwraca klucz API Gemini ze zmiennych środowiskowych lub .env (bez pytania użytkownika)."""
+    env_path = _get_env_path()
+
+    # Wymuś załadowanie z konkretnej ścieżki
+    if env_path.exists():
+        load_dotenv(dotenv_path=env_path, override=True)
+
+    return os.getenv('GEMINI_API_KEY')
+
+
 def check_api_key() -> Optional[str]:
     """
     Sprawdza dostępność klucza API Gemini.
     Jeśli brak — prosi użytkownika o podanie i zapisuje w .env.
     """
     env_path = _get_env_path()
-    
-    # Wymuś załadowanie z konkretnej ścieżki
-    if env_path.exists():
-        load_dotenv(dotenv_path=env_path, override=True)
-    
-    api_key = os.getenv('GEMINI_API_KEY')
+    api_key = load_api_key()
 
     if api_key:
         return api_key
@@ -71,7 +87,7 @@ def verify_api_connection(api_key: str) -> bool:
     try:
         import google.generativeai as genai
         genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        model = genai.GenerativeModel(GEMINI_MODEL)
         response = model.generate_content("Respond with only: OK")
         return bool(response.text)
     except Exception as e:
@@ -79,6 +95,37 @@ def verify_api_connection(api_key: str) -> bool:
         return False
 
 
+_model_lock = threading.Lock()
+_cached_model = None
+_cached_model_key = None
+
+
+def get_model(api_key: Optional[str] = None) -> Any:
+    """
+    Zwraca długo żyjący, skonfigurowany model Gemini (tworzony raz na proces).
+    Nie wykonuje zapytania testowego — błędy klucza wyjdą przy pierwszym użyciu.
+
+    Raises:
+        RuntimeError: gdy brak klucza API lub pakietu google-generativeai
+    """
+    global _cached_model, _cached_model_key
+
+    api_key = api_key or load_api_key()
+    if not api_key:
+        raise RuntimeError("Brak klucza API Gemini (GEMINI_API_KEY)")
+
+    with _model_lock:
+        if _cached_model is None or _cached_model_key != api_key:
+            try:
+                import google.generativeai as genai
+            except ImportError:
+                raise RuntimeError("Brak pakietu google-generativeai. Zainstaluj: pip install google-generativeai")
+            genai.configure(api_key=api_key)
+            _cached_model = genai.GenerativeModel(GEMINI_MODEL)
+            _cached_model_key = api_key
+        return _cached_model
+
+
 # ─── Prompt Building ───────────────────────────────────────────────────────────
 
 STYLE_CONTINUOUS = """
@@ -111,6 +158,21 @@ CHECKLIST_INSTRUCTION = """
 - Jeśli nie ma konkretnych zadań, dodaj najważniejsze takeaway'e do zapamiętania
 """
 
+FORMATTING_INSTRUCTION = """## Formatowanie
+- Używaj formatowania Markdown
+- Nagłówek H1 (#) z tytułem notatki (użyj tytułu wideo z transkrypcji)
+- Sekcje z nagłówkami H2 (##) lub H3 (###)
+- Wyróżniaj kluczowe pojęcia **pogrubieniem**
+- Linki i odniesienia zachowaj jeśli się pojawiły w transkrypcji
+- Używaj cytatów (>) dla szczególnie ważnych wypowiedzi"""
+
+GUIDELINES_INSTRUCTION = """## Wytyczne
+- Pisz w tym samym języku co transkrypcja
+- Skup się na meritum — pomijaj wątki poboczne, powtórzenia i wypełniacze
+- Zachowaj wszystkie ważne fakty, liczby, nazwy własne
+- Notatki powinny być samodzielnym źródłem wiedzy — czytelnik nie musi oglądać wideo
+- Nie dodawaj informacji od siebie, bazuj wyłącznie na transkrypcji"""
+
 
 def build_prompt(transcript_content: str, note_type: str, include_checklist: bool) -> str:
     """Buduje prompt dla Gemini na podstawie wybranego typu notatki."""
@@ -127,20 +189,9 @@ Na podstawie poniższej transkrypcji wideo utwórz szczegółowe notatki.
 
 {checklist}
 
-## Formatowanie
-- Używaj formatowania Markdown
-- Nagłówek H1 (#) z tytułem notatki (użyj tytułu wideo z transkrypcji)
-- Sekcje z nagłówkami H2 (##) lub H3 (###)
-- Wyróżniaj kluczowe pojęcia **pogrubieniem**
-- Linki i odniesienia zachowaj jeśli się pojawiły w transkrypcji
-- Używaj cytatów (>) dla szczególnie ważnych wypowiedzi
+{FORMATTING_INSTRUCTION}
 
-## Wytyczne
-- Pisz w tym samym języku co transkrypcja
-- Skup się na meritum — pomijaj wątki poboczne, powtórzenia i wypełniacze
-- Zachowaj wszystkie ważne fakty, liczby, nazwy własne
-- Notatki powinny być samodzielnym źródłem wiedzy — czytelnik nie musi oglądać wideo
-- Nie dodawaj informacji od siebie, bazuj wyłącznie na transkrypcji
+{GUIDELINES_INSTRUCTION}
 
 ---
 
@@ -151,13 +202,288 @@ Na podstawie poniższej transkrypcji wideo utwórz szczegółowe notatki.
     return prompt
 
 
+# ─── Map-Reduce (długie transkrypcje) ──────────────────────────────────────────
+
+# Maksymalny rozmiar pojedynczego fragmentu (w znakach) i liczba równoległych
+# zapytań do modelu w fazie "map". Transkrypcje krótsze niż CHUNK_MAX_CHARS
+# idą jednym zapytaniem, jak dotychczas.
+CHUNK_MAX_CHARS = int(os.getenv('NOTES_CHUNK_MAX_CHARS', '24000'))
+CHUNK_MAX_CONCURRENCY = int(os.getenv('NOTES_MAX_CONCURRENCY', '4'))
+
+TRANSCRIPT_SECTION_HEADER = "## Transkrypcja"
+
+CHUNK_PROMPT = """Jesteś ekspertem w tworzeniu zwięzłych, wartościowych notatek z transkrypcji wideo.
+
+## Zadanie
+Poniżej znajduje się fragment {index} z {total} transkrypcji wideo "{title}".
+Utwórz szczegółowe notatki robocze z tego fragmentu — posłużą one później do złożenia jednej, pełnej notatki.
+
+## Wytyczne
+- Pisz w tym samym języku co transkrypcja
+- Zachowaj wszystkie ważne fakty, liczby, nazwy własne, definicje i wnioski
+- Przy każdym nowym temacie podaj znacznik czasu, od którego się zaczyna (np. [12:34])
+- Jeśli we fragmencie pojawiają się zadania do wykonania, wypisz je osobno
+- Pomijaj wątki poboczne, powtórzenia i wypełniacze
+- Nie dodawaj informacji od siebie, bazuj wyłącznie na fragmencie
+
+---
+
+## Fragment transkrypcji:
+
+{chunk}"""
+
+
+def split_transcript(transcript_content: str, max_chars: int = CHUNK_MAX_CHARS) -> Tuple[str, List[str]]:
+    """
+    Dzieli transkrypcję Markdown na nagłówek (metadane, opis) i fragmenty treści.
+
+    Podział następuje wyłącznie na granicach segmentów (linie ze znacznikiem
+    czasu) i nagłówków sekcji — nowa sekcja zaczyna nowy fragment, jeśli
+    bieżący jest wypełniony co najmniej w połowie.
+
+    Returns:
+        Krotka (nagłówek, lista fragmentów)
+    """
+    header = ""
+    body = transcript_content
+    marker = transcript_content.find(TRANSCRIPT_SECTION_HEADER)
+    if marker != -1:
+        header = transcript_content[:marker].strip().rstrip('-').strip()
+        body = transcript_content[marker + len(TRANSCRIPT_SECTION_HEADER):]
+
+    blocks = [block.strip() for block in re.split(r'\n\s*\n', body) if block.strip()]
+
+    chunks = []
+    current = []
+    current_len = 0
+    for block in blocks:
+        # Pojedynczy segment dłuższy niż limit — tnij na granicy słów
+        while len(block) > max_chars:
+            cut = block.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            piece, block = block[:cut].strip(), block[cut:].strip()
+            if current:
+                chunks.append("\n\n".join(current))
+                current, current_len = [], 0
+            chunks.append(piece)
+
+        is_section = block.startswith('#')
+        if current and (current_len + len(block) > max_chars or (is_section and current_len >= max_chars // 2)):
+            chunks.append("\n\n".join(current))
+            current, current_len = [], 0
+
+        current.append(block)
+        current_len += len(block) + 2
+
+    if current:
+        chunks.append("\n\n".join(current))
+
+    return header, chunks
+
+
+def _extract_title(header: str) -> str:
+    """Zwraca tytuł wideo z nagłówka H1 transkrypcji."""
+    for line in header.splitlines():
+        if line.startswith('# '):
+            return line[2:].strip()
+    return "Transkrypcja filmu"
+
+
+def build_reduce_prompt(header: str, partial_notes: List[str], note_type: str, include_checklist: bool) -> str:
+    """Buduje prompt scalający notatki cząstkowe w jedną notatkę w wybranym stylu."""
+
+    style = STYLE_CONTINUOUS if note_type == 'continuous' else STYLE_BULLET
+    checklist = CHECKLIST_INSTRUCTION if include_checklist else ""
+
+    parts = "\n\n".join(
+        f"### Fragment {i}/{len(partial_notes)}\n\n{notes}"
+        for i, notes in enumerate(partial_notes, 1)
+    )
+
+    prompt = f"""Jesteś ekspertem w tworzeniu zwięzłych, wartościowych notatek z transkrypcji wideo.
+
+## Zadanie
+Transkrypcja wideo została podzielona na kolejne fragmenty, a z każdego z nich sporządzono notatki robocze.
+Na ich podstawie utwórz jedną, spójną i szczegółową notatkę z całego wideo.
+Scal powtarzające się wątki, zachowaj chronologię i nie gub informacji z żadnego fragmentu.
+
+{style}
+
+{checklist}
+
+{FORMATTING_INSTRUCTION}
+
+{GUIDELINES_INSTRUCTION}
+
+---
+
+## Informacje o wideo:
+
+{header}
+
+## Notatki z kolejnych fragmentów:
+
+{parts}"""
+
+    return prompt
+
+
+def summarize_chunks(chunks: List[str], title: str, model: Any, max_concurrency: int = CHUNK_MAX_CONCURRENCY) -> List[str]:
+    """
+    Faza "map" — streszcza fragmenty równolegle (maks. max_concurrency zapytań naraz).
+
+    Args:
+        model: Dowolny obiekt z metodą generate_content(prompt) zwracającą obiekt z polem .text
+
+    Returns:
+        Notatki cząstkowe w kolejności fragmentów
+    """
+    prompts = [
+        CHUNK_PROMPT.format(index=i, total=len(chunks), title=title, chunk=chunk)
+        for i, chunk in enumerate(chunks, 1)
+    ]
+
+    workers = max(1, min(max_concurrency, len(prompts)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda prompt: model.generate_content(prompt).text, prompts))
+
+
+def prepare_notes_prompt(
+    transcript_content: str,
+    note_type: str,
+    include_checklist: bool,
+    model: Any,
+    max_chars: int = CHUNK_MAX_CHARS,
+    max_concurrency: int = CHUNK_MAX_CONCURRENCY
+) -> str:
+    """
+    Zwraca finalny prompt notatki. Dla długich transkrypcji najpierw wykonuje
+    fazę "map" (równoległe streszczenia fragmentów) i zwraca prompt "reduce".
+    """
+    if len(transcript_content) <= max_chars:
+        return build_prompt(transcript_content, note_type, include_checklist)
+
+    header, chunks = split_transcript(transcript_content, max_chars)
+    if len(chunks) <= 1:
+        return build_prompt(transcript_content, note_type, include_checklist)
+
+    print(f"🔀 Długa transkrypcja — dzielę na {len(chunks)} fragmentów "
+          f"(równolegle: {min(max_concurrency, len(chunks))})...")
+    partial_notes = summarize_chunks(chunks, _extract_title(header), model, max_concurrency)
+    return build_reduce_prompt(header, partial_notes, note_type, include_checklist)
+
+
+def summarize_transcript(
+    transcript_content: str,
+    note_type: str,
+    include_checklist: bool,
+    model: Any,
+    max_chars: int = CHUNK_MAX_CHARS,
+    max_concurrency: int = CHUNK_MAX_CONCURRENCY
+) -> str:
+    """
+    Generuje treść notatek — jednym zapytaniem lub w trybie map-reduce.
+
+    Args:
+        model: Dowolny obiekt z metodą generate_content(prompt) zwracającą obiekt z polem .text
+               (np. genai.GenerativeModel lub atrapa w testach)
+    """
+    prompt = prepare_notes_prompt(
+        transcript_content, note_type, include_checklist, model, max_chars, max_concurrency
+    )
+    return model.generate_content(prompt).text
+
+
+def compact_for_prompt(transcript_content: str) -> str:
+    """Kompaktuje transkrypcję przed budową promptu i wypisuje oszczędność tokenów."""
+    compacted, stats = compact_markdown(transcript_content)
+    if stats['saved_tokens'] > 0:
+        print(f"🗜️  Kompaktowanie transkrypcji: ~{stats['original_tokens']:,} → "
+              f"~{stats['compacted_tokens']:,} tokenów "
+              f"(oszczędność ~{stats['saved_tokens']:,}, {stats['saved_percent']}%)")
+    return compacted
+
+
+# ─── Notes Cache ───────────────────────────────────────────────────────────────
+
+_prompt_version: Optional[str] = None
+
+
+def prompt_version() -> str:
+    """
+    Wersja promptów — skrót wyrenderowanych szablonów (pojedynczy, map, reduce)
+    dla wszystkich wariantów notatek. Każda zmiana promptów w tym pliku zmienia
+    wersję i tym samym unieważnia notatki w pamięci podręcznej.
+    """
+    global _prompt_version
+    if _prompt_version is None:
+        import hashlib
+        templates = [CHUNK_PROMPT]
+        for note_type in ('continuous', 'bullet'):
+            for include_checklist in (False, True):
+                templates.append(build_prompt("", note_type, include_checklist))
+                templates.append(build_reduce_prompt("", [""], note_type, include_checklist))
+        _prompt_version = hashlib.sha256("\0".join(templates).encode('utf-8')).hexdigest()[:16]
+    return _prompt_version
+
+
+def notes_cache_key(transcript_content: str, note_type: str, include_checklist: bool) -> str:
+    """Klucz notatek: treść trafiająca do modelu (po kompaktowaniu), wersja promptów, model i opcje"""
+    options = {
+        "note_type": 'continuous' if note_type == 'continuous' else 'bullet',
+        "include_checklist": bool(include_checklist),
+        "chunk_max_chars": CHUNK_MAX_CHARS,
+    }
+    return notes_cache.cache_key(transcript_content, prompt_version(), GEMINI_MODEL, options)
+
+
+def cached_notes(transcript_content: str, note_type: str, include_checklist: bool) -> Optional[str]:
+    """Notatki z pamięci podręcznej (bez klucza API i bez połączenia z siecią) lub None"""
+    key = notes_cache_key(transcript_content, note_type, include_checklist)
+    return notes_cache.get(key, prompt_version())
+
+
+def store_notes(transcript_content: str, note_type: str, include_checklist: bool, notes: str) -> None:
+    key = notes_cache_key(transcript_content, note_type, include_checklist)
+    notes_cache.put(key, prompt_version(), notes)
+
+
+def _open_notes_tmp(output_path: str) -> Tuple[Any, str]:
+    """Plik tymczasowy obok output_path (otwarty do zapisu) i jego ścieżka"""
+    directory = os.path.dirname(output_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    from youtube_transcript_downloader import file_mode_for
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.md')
+    # mkstemp tworzy plik 0600 — notatki mają uprawnienia jak zwykły zapis (lub jak poprzednia wersja)
+    os.fchmod(fd, file_mode_for(output_path))
+    return os.fdopen(fd, 'w', encoding='utf-8'), tmp_path
+
+
+def _write_notes(output_path: str, notes_content: str) -> None:
+    """Zapisz notatki atomowo (plik tymczasowy + rename)"""
+    output, tmp_path = _open_notes_tmp(output_path)
+    try:
+        with output:
+            output.write(notes_content)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 # ─── Notes Generation ──────────────────────────────────────────────────────────
 
 def generate_notes(
     transcript_content: str,
     note_type: str,
     include_checklist: bool,
-    output_path: str
+    output_path: str,
+    max_concurrency: int = CHUNK_MAX_CONCURRENCY,
+    compact: bool = True,
+    use_cache: bool = True
 ) -> bool:
     """
     Generuje notatki z transkrypcji za pomocą Gemini API i zapisuje do pliku.
@@ -167,16 +493,30 @@ def generate_notes(
         note_type: 'continuous' lub 'bullet'
         include_checklist: Czy dodać checklistę na końcu
         output_path: Ścieżka do pliku wyjściowego
+        max_concurrency: Maks. liczba równoległych zapytań przy długich transkrypcjach
+        compact: Czy skompaktować transkrypcję przed wysłaniem do modelu
+        use_cache: Czy użyć notatek z pamięci podręcznej (False = wygeneruj od nowa)
 
     Returns:
         True jeśli udało się wygenerować notatki, False w przeciwnym wypadku
     """
-    # 1. Sprawdź klucz API
+    if compact:
+        transcript_content = compact_for_prompt(transcript_content)
+
+    # 1. Pamięć podręczna — trafienie nie wymaga klucza API ani połączenia
+    if use_cache:
+        notes_content = cached_notes(transcript_content, note_type, include_checklist)
+        if notes_content is not None:
+            _write_notes(output_path, notes_content)
+            print(f"✅ Notatki (z pamięci podręcznej) zapisane w: {output_path}")
+            return True
+
+    # 2. Sprawdź klucz API
     api_key = check_api_key()
     if not api_key:
         return False
 
-    # 2. Import Gemini SDK
+    # 3. Import Gemini SDK
     try:
         import google.generativeai as genai
     except ImportError:
@@ -184,7 +524,7 @@ def generate_notes(
         print("   Zainstaluj: pip install google-generativeai")
         return False
 
-    # 3. Weryfikacja połączenia
+    # 4. Weryfikacja połączenia
     print("\n🔄 Weryfikacja połączenia z API Gemini...")
     genai.configure(api_key=api_key)
 
@@ -202,7 +542,6 @@ def generate_notes(
                     with open(env_path, 'r') as f:
                         env_content = f.read()
                     # Zamień stary klucz
-                    import re
                     env_content = re.sub(
                         r'GEMINI_API_KEY=.*',
                         f'GEMINI_API_KEY={new_key}',
@@ -223,25 +562,22 @@ def generate_notes(
         else:
             return False
 
-    # 4. Generowanie notatek
+    # 5. Generowanie notatek
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-
-        prompt = build_prompt(transcript_content, note_type, include_checklist)
+        model = genai.GenerativeModel(GEMINI_MODEL)
 
         type_label = "ciągłe" if note_type == 'continuous' else "punktowane"
         checklist_label = " + checklista" if include_checklist else ""
         print(f"📝 Generowanie notatek ({type_label}{checklist_label})...")
         print("   To może potrwać chwilę...\n")
 
-        response = model.generate_content(prompt)
-        notes_content = response.text
-
-        # Upewnij się, że folder docelowy istnieje
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        notes_content = summarize_transcript(
+            transcript_content, note_type, include_checklist, model,
+            max_concurrency=max_concurrency
+        )
+        store_notes(transcript_content, note_type, include_checklist, notes_content)
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(notes_content)
+        _write_notes(output_path, notes_content)
 
         print(f"✅ Notatki zapisane w: {output_path}")
         return True
@@ -251,8 +587,118 @@ def generate_notes(
         return False
 
 
+# ─── Non-interactive / Streaming ───────────────────────────────────────────────
+
+def notes_path_for(transcript_file_path: str) -> str:
+    """Transcripts/Title.md → Transcripts/Title-notes.md"""
+    base, ext = os.path.splitext(transcript_file_path)
+    return f"{base}-notes{ext or '.md'}"
+
+
+def stream_notes(
+    transcript_content: str,
+    note_type: str,
+    include_checklist: bool,
+    output_path: Optional[str] = None,
+    model: Any = None,
+    max_concurrency: int = CHUNK_MAX_CONCURRENCY,
+    compact: bool = True,
+    use_cache: bool = True
+) -> Iterator[str]:
+    """
+    Generuje notatki bez interakcji z użytkownikiem i zwraca je kawałkami,
+    w miarę jak model je produkuje. Jeśli podano output_path, kawałki trafiają
+    do pliku tymczasowego, który zastępuje output_path dopiero po całym
+    strumieniu — błąd modelu lub zerwane połączenie nie nadpisują istniejących
+    notatek pustym albo uciętym plikiem. Notatki z pamięci podręcznej są zwracane
+    od razu, bez tworzenia modelu.
+
+    Args:
+        model: Model z metodą generate_content(prompt, stream=True); domyślnie get_model()
+        use_cache: Czy użyć notatek z pamięci podręcznej (False = wygeneruj od nowa)
+
+    Yields:
+        Kolejne fragmenty tekstu notatek
+    """
+    if compact:
+        transcript_content = compact_for_prompt(transcript_content)
+
+    if use_cache:
+        notes_content = cached_notes(transcript_content, note_type, include_checklist)
+        if notes_content is not None:
+            if output_path:
+                _write_notes(output_path, notes_content)
+            yield notes_content
+            return
+
+    model = model or get_model()
+    prompt = prepare_notes_prompt(
+        transcript_content, note_type, include_checklist, model,
+        max_concurrency=max_concurrency
+    )
+
+    output = tmp_path = None
+    if output_path:
+        output, tmp_path = _open_notes_tmp(output_path)
+
+    parts = []
+    completed = False
+    try:
+        for chunk in model.generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Kawałek bez treści (np. tylko finish_reason)
+                continue
+            if not text:
+                continue
+            if output:
+                output.write(text)
+                output.flush()
+            parts.append(text)
+            yield text
+        completed = True
+    finally:
+        if output:
+            output.close()
+            if completed:
+                os.replace(tmp_path, output_path)
+            else:
+                os.remove(tmp_path)
+
+    # Do pamięci podręcznej trafiają tylko kompletne notatki (nie przerwany strumień)
+    store_notes(transcript_content, note_type, include_checklist, "".join(parts))
+
+
+def create_notes(
+    transcript_content: str,
+    note_type: str,
+    include_checklist: bool,
+    output_path: Optional[str] = None,
+    model: Any = None,
+    max_concurrency: int = CHUNK_MAX_CONCURRENCY,
+    compact: bool = True,
+    use_cache: bool = True
+) -> str:
+    """Programowy odpowiednik generate_notes — bez input() i bez zapytania testowego. Zwraca treść notatek."""
+    return "".join(stream_notes(
+        transcript_content, note_type, include_checklist, output_path, model, max_concurrency, compact, use_cache
+    ))
+
+
 # ─── Interactive Flow ──────────────────────────────────────────────────────────
 
+def _prewarm_gemini_sdk() -> None:
+    """Importuje google.generativeai w tle, zanim użytkownik odpowie na pytania."""
+    def load():
+        try:
+            import google.generativeai  # noqa: F401
+        except Exception:
+            pass
+
+    threading.Thread(target=load, daemon=True).start()
+
+
 def interactive_notes_flow(transcript_file_path: str, transcript_content: str) -> None:
     """
     Interaktywny flow — pytania po pobraniu transkrypcji.
@@ -261,6 +707,9 @@ def interactive_notes_flow(transcript_file_path: str, transcript_content: str) -
         transcript_file_path: Ścieżka do zapisanego pliku transkrypcji (np. Transcripts/Title.md)
         transcript_content: Sformatowana treść transkrypcji
     """
+    # Import SDK (kilkaset ms) leci równolegle z pytaniami do użytkownika
+    _prewarm_gemini_sdk()
+
     print("\n" + "=" * 60)
     create_notes = input("📝 Czy utworzyć notatki z transkrypcji? (y/n): ").strip().lower()
 
@@ -287,8 +736,7 @@ def interactive_notes_flow(transcript_file_path: str, transcript_content: str) -
     include_checklist = checklist_choice == 'y'
 
     # Ścieżka wyjściowa: Transcripts/Title.md → Transcripts/Title-notes.md
-    base, ext = os.path.splitext(transcript_file_path)
-    notes_output_path = f"{base}-notes{ext}"
+    notes_output_path = notes_path_for(transcript_file_path)
 
     # Generuj notatki
     generate_notes(transcript_content, note_type, include_checklist, notes_output_path)
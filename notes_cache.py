@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Pamięć podręczna wygenerowanych notatek (adresowana treścią).
+
+Klucz to skrót SHA-256 z treści wysyłanej do modelu, wersji szablonów
+promptów, nazwy modelu i opcji notatek — ta sama transkrypcja z tymi samymi
+ustawieniami nie jest generowana drugi raz, a trafienie nie wymaga żadnego
+połączenia z siecią. Wpisy każdej wersji promptów leżą w osobnym katalogu;
+po zmianie promptów w notes_agent.py stare katalogi są usuwane przy
+pierwszym zapisie. Wpisy starsze niż NOTES_CACHE_MAX_AGE_DAYS oraz
+najstarsze wpisy ponad NOTES_CACHE_MAX_MB są usuwane.
+
+    python notes_cache.py --stats
+    python notes_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+CACHE_DIR = os.environ.get('NOTES_CACHE_DIR', os.path.join('Transcripts', '.notes_cache'))
+CACHE_ENABLED = os.environ.get('NOTES_CACHE', '1') != '0'
+CACHE_MAX_BYTES = int(float(os.environ.get('NOTES_CACHE_MAX_MB', 100)) * 1024 * 1024)
+CACHE_MAX_AGE = float(os.environ.get('NOTES_CACHE_MAX_AGE_DAYS', 30)) * 86400
+
+_lock = threading.Lock()
+
+
+def cache_key(content: str, version: str, model_name: str, options: Dict[str, Any]) -> str:
+    """Skrót treści, wersji promptów, modelu i opcji"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        {"version": version, "model": model_name, "options": options},
+        sort_keys=True
+    ).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(content.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _entry_path(key: str, version: str, cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, version, key[:2], f"{key}.md")
+
+
+def get(key: str, version: str, cache_dir: Optional[str] = None) -> Optional[str]:
+    """Notatki z pamięci podręcznej lub None (brak albo wpis przeterminowany)"""
+    if not CACHE_ENABLED:
+        return None
+    path = _entry_path(key, version, cache_dir)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_MAX_AGE:
+            os.remove(path)
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def put(key: str, version: str, notes: str, cache_dir: Optional[str] = None) -> None:
+    """Zapisz notatki (atomowo) i w razie potrzeby usuń stare wpisy"""
+    if not CACHE_ENABLED or not notes:
+        return
+    path = _entry_path(key, version, cache_dir)
+    new_version = not os.path.isdir(os.path.join(cache_dir or CACHE_DIR, version))
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(notes)
+        os.replace(tmp_path, path)
+
+        with _lock:
+            if new_version:
+                prune_versions(version, cache_dir)
+            enforce_limits(cache_dir)
+    except OSError as e:
+        print(f"Błąd zapisu pamięci podręcznej notatek: {e}")
+
+
+def _entries(cache_dir: Optional[str] = None) -> List[Tuple[float, int, str]]:
+    """(mtime, rozmiar, ścieżka) wszystkich wpisów"""
+    entries = []
+    for root, _, files in os.walk(cache_dir or CACHE_DIR):
+        for name in files:
+            if not name.endswith('.md'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def enforce_limits(cache_dir: Optional[str] = None) -> int:
+    """Usuń wpisy przeterminowane, a potem najstarsze ponad limit rozmiaru; zwraca liczbę usuniętych"""
+    now = time.time()
+    removed = 0
+    entries = sorted(_entries(cache_dir))
+    total = sum(size for _, size, _ in entries)
+
+    for mtime, size, path in entries:
+        if now - mtime <= CACHE_MAX_AGE and total <= CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+            total -= size
+        except OSError:
+            pass
+    return removed
+
+
+def prune_versions(current_version: str, cache_dir: Optional[str] = None) -> int:
+    """Usuń wpisy innych wersji promptów niż bieżąca; zwraca liczbę usuniętych katalogów"""
+    cache_dir = cache_dir or CACHE_DIR
+    removed = 0
+    if not os.path.isdir(cache_dir):
+        return removed
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name != current_version and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def clear(cache_dir: Optional[str] = None) -> int:
+    """Usuń całą pamięć podręczną notatek; zwraca liczbę usuniętych wpisów"""
+    cache_dir = cache_dir or CACHE_DIR
+    count = len(_entries(cache_dir))
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    return count
+
+
+def stats(cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    entries = _entries(cache_dir)
+    return {
+        "enabled": CACHE_ENABLED,
+        "path": cache_dir or CACHE_DIR,
+        "entries": len(entries),
+        "bytes": sum(size for _, size, _ in entries),
+        "max_bytes": CACHE_MAX_BYTES,
+        "max_age_days": round(CACHE_MAX_AGE / 86400, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pamięć podręczna notatek Gemini")
+    parser.add_argument("--stats", action="store_true", help="Pokaż liczbę i rozmiar wpisów")
+    parser.add_argument("--clear", action="store_true", help="Usuń wszystkie wpisy")
+    parser.add_argument("--prune", action="store_true", help="Usuń wpisy przeterminowane i ponad limit rozmiaru")
+    args = parser.parse_args()
+
+    if args.clear:
+        print(f"Usunięto wpisów: {clear()}")
+    elif args.prune:
+        print(f"Usunięto wpisów: {enforce_limits()}")
+    else:
+        print(json.dumps(stats(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
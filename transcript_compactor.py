@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Kompaktowanie transkrypcji przed wysłaniem do LLM.
+
+Markdown z youtube_transcript_downloader ma znacznik **[MM:SS]** i pustą linię
+przy każdym segmencie napisów, a napisy automatyczne są mocno poszatkowane
+i powtarzają się. Ten moduł skleja segmenty w akapity (po przerwach w mowie
+i interpunkcji), usuwa powtórzenia i zostawia tylko zgrubne znaczniki czasu.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TRANSCRIPT_SECTION_HEADER = "## Transkrypcja"
+
+# Nowy akapit, gdy przerwa w mowie przekracza PARAGRAPH_GAP_SECONDS, albo gdy
+# akapit trwa co najmniej PARAGRAPH_MIN_SECONDS i kończy się zdaniem.
+# Akapity dłuższe niż PARAGRAPH_MAX_SECONDS są zawsze zamykane.
+PARAGRAPH_GAP_SECONDS = 2.0
+PARAGRAPH_MIN_SECONDS = 30.0
+PARAGRAPH_MAX_SECONDS = 90.0
+# Bez czasu trwania segmentu (Markdown) przerwę szacujemy z odstępu między
+# startami kolejnych segmentów — stąd wyższy próg niż PARAGRAPH_GAP_SECONDS
+PARAGRAPH_START_GAP_SECONDS = 10.0
+
+# Ile ostatnich słów akapitu porównujemy z początkiem kolejnego segmentu
+OVERLAP_WINDOW_WORDS = 30
+# Krótsze powtórzenia (np. „I said that” + „that was it”) to zwykle prawdziwa treść
+OVERLAP_MIN_WORDS = 3
+
+_TIMESTAMP_LINE = re.compile(r'^\*\*\[(\d{1,2}(?::\d{2}){1,2})\]\*\*\s?(.*)$')
+_SENTENCE_END = re.compile(r'[.!?…]["\')\]]?$')
+
+
+def estimate_tokens(text: str) -> int:
+    """Szacunkowa liczba tokenów (~4 znaki na token) — wystarczająca do porównań."""
+    return (len(text) + 3) // 4
+
+
+def parse_timestamp(value: str) -> float:
+    """Zamienia 'SS', 'MM:SS' lub 'HH:MM:SS' na sekundy."""
+    seconds = 0.0
+    for part in value.strip().split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """Formatuje czas w sekundach do formatu [HH:]MM:SS"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = int(seconds % 60)
+
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def parse_markdown_transcript(content: str) -> Tuple[str, List[Tuple[float, Optional[float], str]]]:
+    """
+    Rozbiera Markdown z MarkdownFormatter na nagłówek i segmenty.
+
+    Returns:
+        Krotka (nagłówek, lista segmentów (start, duration, tekst)); duration
+        jest None, bo Markdown nie przechowuje czasu trwania segmentu
+    """
+    header = ""
+    body = content
+    marker = content.find(TRANSCRIPT_SECTION_HEADER)
+    if marker != -1:
+        header = content[:marker].strip()
+        body = content[marker + len(TRANSCRIPT_SECTION_HEADER):]
+
+    segments = []
+    for line in body.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _TIMESTAMP_LINE.match(line)
+        if match:
+            segments.append((parse_timestamp(match.group(1)), None, match.group(2)))
+        elif segments:
+            # Kontynuacja segmentu (np. przy --preserve-formatting)
+            start, duration, text = segments[-1]
+            segments[-1] = (start, duration, f"{text} {line}")
+        else:
+            segments.append((0.0, None, line))
+
+    return header, segments
+
+
+def _snippet_fields(snippet: Any) -> Tuple[float, Optional[float], str]:
+    """Obsługuje zarówno obiekty FetchedTranscriptSnippet, jak i słowniki/krotki."""
+    if isinstance(snippet, dict):
+        return float(snippet.get('start', 0.0)), snippet.get('duration'), snippet.get('text', '')
+    if isinstance(snippet, tuple):
+        return snippet
+    return float(snippet.start), getattr(snippet, 'duration', None), snippet.text
+
+
+def _normalize_word(word: str) -> str:
+    """Słowo bez interpunkcji i wielkości liter — do porównywania powtórzeń."""
+    return re.sub(r'[^\w]', '', word.lower())
+
+
+def _drop_overlap(tail_words: List[str], words: List[str]) -> List[str]:
+    """Usuwa z początku segmentu słowa powtórzone z końca poprzedniego (napisy „kroczące”)."""
+    limit = min(len(tail_words), len(words))
+    lowered_tail = [_normalize_word(w) for w in tail_words]
+    lowered = [_normalize_word(w) for w in words]
+    for size in range(limit, OVERLAP_MIN_WORDS - 1, -1):
+        if lowered_tail[-size:] == lowered[:size]:
+            return words[size:]
+    return words
+
+
+def compact_segments(
+    snippets: Iterable[Any],
+    gap_seconds: float = PARAGRAPH_GAP_SECONDS,
+    start_gap_seconds: float = PARAGRAPH_START_GAP_SECONDS,
+    min_paragraph_seconds: float = PARAGRAPH_MIN_SECONDS,
+    max_paragraph_seconds: float = PARAGRAPH_MAX_SECONDS
+) -> List[Tuple[float, str]]:
+    """
+    Skleja segmenty napisów w akapity.
+
+    Returns:
+        Lista akapitów (start, tekst)
+    """
+    paragraphs: List[Tuple[float, List[str]]] = []
+    previous_start: Optional[float] = None
+    previous_end: Optional[float] = None
+    previous_text = None
+
+    for snippet in snippets:
+        start, duration, text = _snippet_fields(snippet)
+        text = ' '.join(text.replace('\n', ' ').split())
+        if not text or text == previous_text:
+            continue
+        previous_text = text
+
+        new_paragraph = not paragraphs
+        if paragraphs:
+            para_start, para_words = paragraphs[-1]
+            elapsed = start - para_start
+            if previous_end is not None and start - previous_end > gap_seconds:
+                new_paragraph = True
+            elif previous_end is None and previous_start is not None and start - previous_start > start_gap_seconds:
+                new_paragraph = True
+            elif elapsed >= max_paragraph_seconds:
+                new_paragraph = True
+            elif elapsed >= min_paragraph_seconds and _SENTENCE_END.search(para_words[-1]):
+                new_paragraph = True
+
+        words = text.split()
+        if not new_paragraph:
+            words = _drop_overlap(paragraphs[-1][1][-OVERLAP_WINDOW_WORDS:], words)
+        if words:
+            if new_paragraph:
+                paragraphs.append((start, words))
+            else:
+                paragraphs[-1][1].extend(words)
+
+        previous_start = start
+        previous_end = start + duration if duration is not None else None
+
+    return [(start, ' '.join(words)) for start, words in paragraphs]
+
+
+def render_compact(header: str, paragraphs: List[Tuple[float, str]]) -> str:
+    """Składa nagłówek i akapity w zwięzły Markdown (zgodny z notes_agent.split_transcript)."""
+    lines = [line for line in header.splitlines() if line.strip() and line.strip() != '---']
+    content = []
+    if lines:
+        content.append("\n".join(lines))
+    content.append(TRANSCRIPT_SECTION_HEADER)
+    content.extend(f"[{format_timestamp(start)}] {text}" for start, text in paragraphs)
+    return "\n\n".join(content) + "\n"
+
+
+def compaction_stats(original: str, compacted: str) -> Dict[str, Any]:
+    """Zwraca statystyki oszczędności tokenów."""
+    original_tokens = estimate_tokens(original)
+    compacted_tokens = estimate_tokens(compacted)
+    saved = original_tokens - compacted_tokens
+    return {
+        "original_tokens": original_tokens,
+        "compacted_tokens": compacted_tokens,
+        "saved_tokens": saved,
+        "saved_percent": round(100.0 * saved / original_tokens, 1) if original_tokens else 0.0
+    }
+
+
+def compact_markdown(content: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Kompaktuje transkrypcję Markdown do reprezentacji dla LLM.
+
+    Returns:
+        Krotka (zwięzła transkrypcja, statystyki tokenów). Jeśli treść nie
+        zawiera segmentów ze znacznikami czasu, zwracana jest bez zmian.
+    """
+    header, segments = parse_markdown_transcript(content)
+    if not segments:
+        return content, compaction_stats(content, content)
+
+    compacted = render_compact(header, compact_segments(segments))
+    return compacted, compaction_stats(content, compacted)
+
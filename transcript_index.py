@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Indeks pełnotekstowy (SQLite FTS5) archiwum transkrypcji.
+
+Każdy zapisany plik .md jest dzielony na krótkie okna segmentów z czasem
+startu, dzięki czemu wyszukiwanie zwraca konkretne miejsca w filmach
+(z linkiem do danej sekundy), a nie tylko nazwy plików.
+"""
+
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from transcript_compactor import compact_segments, format_timestamp, parse_markdown_transcript
+
+INDEX_PATH = os.environ.get('TRANSCRIPT_INDEX_PATH', os.path.join('Transcripts', '.transcripts_index.sqlite3'))
+INDEX_ENABLED = os.environ.get('TRANSCRIPT_INDEX', '1') != '0'
+
+# Okna indeksu: krótsze niż akapity dla LLM, żeby trafienia wskazywały dokładne miejsce
+WINDOW_MIN_SECONDS = 8.0
+WINDOW_MAX_SECONDS = 20.0
+
+# Wycinki z CLI (--start/--end, --segments) mają sufiks zakresu, np. Tytuł.720-1080s.md
+# lub Tytuł.seg10-20.md — nie trafiają do indeksu, żeby nie dublować pełnej transkrypcji
+SLICE_NAME_PATTERN = re.compile(r'\.(?:seg\d+-\d+|\d+-(?:\d+|end)s)\.md$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    video_id TEXT NOT NULL,
+    title TEXT,
+    channel TEXT,
+    language TEXT,
+    mtime REAL,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS documents_video_id ON documents(video_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5(
+    text,
+    document_id UNINDEXED,
+    start UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_HEADER_FIELDS = {
+    'video_id': re.compile(r'^\*\*Video ID:\*\*\s*(.+)$', re.MULTILINE),
+    'channel': re.compile(r'^\*\*Kanał:\*\*\s*(.+)$', re.MULTILINE),
+    'language': re.compile(r'^\*\*Kod języka:\*\*\s*(.+)$', re.MULTILINE),
+    'title': re.compile(r'^#\s+(.+)$', re.MULTILINE),
+}
+
+
+def connect(index_path: Optional[str] = None) -> sqlite3.Connection:
+    """Otwórz (i w razie potrzeby utwórz) bazę indeksu"""
+    index_path = index_path or INDEX_PATH
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+
+    conn = sqlite3.connect(index_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def parse_header(content: str) -> Dict[str, Optional[str]]:
+    """Wyciągnij video_id, tytuł, kanał i język z nagłówka transkrypcji Markdown"""
+    header = {}
+    for field, pattern in _HEADER_FIELDS.items():
+        match = pattern.search(content)
+        header[field] = match.group(1).strip() if match else None
+    return header
+
+
+def video_url(video_id: str, start: Optional[float] = None) -> str:
+    """Link do filmu, opcjonalnie do konkretnej sekundy"""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    if start:
+        url += f"&t={int(start)}s"
+    return url
+
+
+def is_slice_path(path: str) -> bool:
+    """Czy plik jest wycinkiem transkrypcji (sufiks zakresu w nazwie)"""
+    return bool(SLICE_NAME_PATTERN.search(os.path.basename(path)))
+
+
+def index_markdown(content: str, path: str, mtime: Optional[float] = None, index_path: Optional[str] = None) -> bool:
+    """
+    Dodaj (lub zastąp) transkrypcję Markdown w indeksie.
+
+    Returns:
+        True jeśli zaindeksowano, False gdy plik nie jest transkrypcją (brak Video ID)
+        albo jest jej wycinkiem
+    """
+    if is_slice_path(path):
+        return False
+
+    header = parse_header(content)
+    if not header['video_id']:
+        return False
+
+    _, segments = parse_markdown_transcript(content)
+    windows = compact_segments(
+        segments,
+        min_paragraph_seconds=WINDOW_MIN_SECONDS,
+        max_paragraph_seconds=WINDOW_MAX_SECONDS
+    )
+
+    path = os.path.abspath(path)
+    if mtime is None and os.path.exists(path):
+        mtime = os.path.getmtime(path)
+
+    conn = connect(index_path)
+    try:
+        with conn:
+            _delete_document(conn, path)
+            cursor = conn.execute(
+                "INSERT INTO documents (path, video_id, title, channel, language, mtime, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, header['video_id'], header['title'], header['channel'], header['language'], mtime, time.time())
+            )
+            document_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO segments (text, document_id, start) VALUES (?, ?, ?)",
+                [(text, document_id, start) for start, text in windows]
+            )
+    finally:
+        conn.close()
+    return True
+
+
+def index_file(path: str, index_path: Optional[str] = None) -> bool:
+    """Zaindeksuj plik .md z dysku"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return index_markdown(content, path, os.path.getmtime(path), index_path)
+
+
+def _delete_document(conn: sqlite3.Connection, path: str) -> None:
+    row = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+    if row:
+        conn.execute("DELETE FROM segments WHERE document_id = ?", (row['id'],))
+        conn.execute("DELETE FROM documents WHERE id = ?", (row['id'],))
+
+
+def rebuild_index(directory: str = 'Transcripts', index_path: Optional[str] = None, full: bool = False) -> Dict[str, int]:
+    """
+    Zsynchronizuj indeks z katalogiem transkrypcji.
+
+    Domyślnie przyrostowo — indeksowane są tylko nowe i zmienione pliki (wg
+    mtime), a usunięte pliki znikają z indeksu. full=True indeksuje wszystko od nowa.
+    """
+    stats = {"indexed": 0, "unchanged": 0, "skipped": 0, "removed": 0}
+    directory = os.path.abspath(directory)
+
+    conn = connect(index_path)
+    try:
+        known = {
+            row['path']: row['mtime']
+            for row in conn.execute("SELECT path, mtime FROM documents WHERE path LIKE ?", (directory + os.sep + '%',))
+        }
+
+        seen = set()
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if (not name.endswith('.md') or name.endswith('-notes.md') or name.startswith('.tmp-')
+                        or is_slice_path(name)):
+                    continue
+                path = os.path.join(root, name)
+                seen.add(path)
+                if not full and known.get(path) == os.path.getmtime(path):
+                    stats["unchanged"] += 1
+                    continue
+                try:
+                    if index_file(path, index_path):
+                        stats["indexed"] += 1
+                    else:
+                        stats["skipped"] += 1
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"Błąd podczas indeksowania {path}: {e}")
+                    stats["skipped"] += 1
+
+        with conn:
+            for path in set(known) - seen:
+                _delete_document(conn, path)
+                stats["removed"] += 1
+    finally:
+        conn.close()
+
+    return stats
+
+
+def indexed_video_ids(index_path: Optional[str] = None) -> Set[str]:
+    """ID wszystkich filmów obecnych w indeksie (archiwum)"""
+    conn = connect(index_path)
+    try:
+        return {row['video_id'] for row in conn.execute("SELECT DISTINCT video_id FROM documents")}
+    finally:
+        conn.close()
+
+
+def find_documents(video_id: str, index_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Zaindeksowane pliki .md danego filmu (najnowsze najpierw)"""
+    conn = connect(index_path)
+    try:
+        rows = conn.execute(
+            "SELECT path, title, language, mtime FROM documents WHERE video_id = ? ORDER BY mtime DESC",
+            (video_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def _fts_query(query: str) -> str:
+    """Zamień zapytanie użytkownika na bezpieczne zapytanie FTS5 (wszystkie słowa muszą wystąpić)"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+def search(query: str, limit: int = 20, index_path: Optional[str] = None, raw: bool = False) -> List[Dict[str, Any]]:
+    """
+    Wyszukaj fragmenty transkrypcji, ranking BM25.
+
+    Args:
+        raw: Przekaż zapytanie bez zmian (pełna składnia FTS5: OR, NEAR, "fraza", prefiks*)
+
+    Returns:
+        Lista trafień z video_id, tytułem, czasem startu i linkiem do tej sekundy filmu
+    """
+    match = query if raw else _fts_query(query)
+    if not match:
+        return []
+
+    conn = connect(index_path)
+    try:
+        rows = conn.execute(
+            """
+            SELECT d.video_id, d.title, d.channel, d.language, d.path, s.start,
+                   snippet(segments, 0, '**', '**', '…', 16) AS snippet,
+                   bm25(segments) AS score
+            FROM segments s
+            JOIN documents d ON d.id = s.document_id
+            WHERE segments MATCH ?
+            ORDER BY score
+            LIMIT ?
+            """,
+            (match, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "video_id": row['video_id'],
+            "title": row['title'],
+            "channel": row['channel'],
+            "language": row['language'],
+            "path": row['path'],
+            "start": row['start'],
+            "timestamp": format_timestamp(row['start']),
+            "url": video_url(row['video_id'], row['start']),
+            "snippet": row['snippet'],
+            "score": round(-row['score'], 4)
+        }
+        for row in rows
+    ]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Zapis plików w tle (write-behind).
+
+API buduje odpowiedź z danych w pamięci, a zapis plików trafia do
+ograniczonej kolejki obsługiwanej przez wątki w tle. Pełna kolejka blokuje
+zgłaszającego (backpressure), zamiast rosnąć bez końca. Przy zamknięciu
+procesu zaległe zapisy są dokańczane.
+"""
+
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+class WriteBehindWriter:
+    """Ograniczona kolejka zadań zapisu obsługiwana przez wątki w tle"""
+
+    def __init__(self, max_pending: int = 64, workers: int = 2):
+        self.max_pending = max(1, max_pending)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_pending)
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+
+        for i in range(max(1, workers)):
+            thread = threading.Thread(target=self._run, name=f"write-behind-{i}", daemon=True)
+            thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Zleć zapis; blokuje, gdy w kolejce jest już max_pending zadań"""
+        future: Future = Future()
+        with self._condition:
+            self._pending += 1
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            future, fn, args, kwargs = self._queue.get()
+            failed = False
+            try:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                print(f"Błąd podczas zapisu w tle: {e}")
+                future.set_exception(e)
+                failed = True
+            finally:
+                with self._condition:
+                    self._pending -= 1
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                    self._condition.notify_all()
+
+    def pending(self) -> int:
+        """Liczba zapisów oczekujących lub w trakcie"""
+        with self._condition:
+            return self._pending
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Poczekaj na zakończenie zaległych zapisów; False, jeśli upłynął timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
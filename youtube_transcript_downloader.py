@@ -1,18 +1,38 @@
 #!/usr/bin/env python3
 """
 Skrypt do pobierania transkrypcji z YouTube
+
+Ciężkie zależności (requests, bs4, youtube_transcript_api, concurrent.futures)
+są importowane dopiero w funkcjach, które ich używają — skrypt jest
+uruchamiany tysiące razy w zadaniach wsadowych, a np. --list czy --search
+nie potrzebują parsera HTML. Budżet czasu importu pilnuje
+benchmarks/import_time.py.
 """
 
 import argparse
+import bisect
 import sys
 import re
 import base64
-from typing import List, Optional, Dict, Any
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter, JSONFormatter, SRTFormatter, WebVTTFormatter, Formatter
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 import os
-import requests
-from bs4 import BeautifulSoup
+from transcript_compactor import parse_timestamp
+
+if TYPE_CHECKING:
+    from youtube_transcript_api import YouTubeTranscriptApi
+    from deadline import Deadline
+
+YOUTUBE_ORIGIN = "https://www.youtube.com"
+
+# Alternatywny adres YouTube (np. lokalny stub z benchmarks/youtube_stub.py do testów obciążeniowych)
+YOUTUBE_BASE_URL = os.environ.get('YOUTUBE_BASE_URL', '').rstrip('/')
+
+
+def youtube_url(url: str) -> str:
+    """Adres zapytania do YouTube — z podmienionym hostem, jeśli ustawiono YOUTUBE_BASE_URL"""
+    if YOUTUBE_BASE_URL and url.startswith(YOUTUBE_ORIGIN):
+        return YOUTUBE_BASE_URL + url[len(YOUTUBE_ORIGIN):]
+    return url
 
 
 def extract_youtube_initial_data(html_content: str) -> Optional[Dict[str, Any]]:
@@ -113,111 +133,235 @@ def extract_full_description_from_data(yt_data: Dict[str, Any]) -> Optional[str]
     return None
 
 
-def get_video_metadata(video_id: str) -> Dict[str, Any]:
-    """Pobierz metadane filmu z YouTube"""
-    try:
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        html_content = response.text
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Pobierz tytuł z różnych miejsc
-        title = None
-        
-        # Spróbuj pobrać tytuł z meta tagów
-        meta_title = soup.find('meta', property='og:title')
+METADATA_FIELDS = ('title', 'channel', 'views', 'publish_date', 'description', 'thumbnail', 'url')
+
+# Pola dostępne z oEmbed (~1 KB JSON) — bez pobierania strony filmu (~1 MB HTML)
+OEMBED_METADATA_FIELDS = ('title', 'channel', 'thumbnail', 'url')
+
+OEMBED_URL = "https://www.youtube.com/oembed"
+
+# Timeout zapytań o metadane; z deadline żądania — najwyżej ta część pozostałego czasu
+METADATA_TIMEOUT = 10
+METADATA_DEADLINE_SHARE = 0.4
+# Pełna strona filmu (~1 MB + parsowanie) nie jest pobierana, gdy zostało mniej czasu
+METADATA_SCRAPE_MIN_SECONDS = float(os.environ.get('METADATA_SCRAPE_MIN_SECONDS', 2.0))
+
+# Timeout zapytań youtube_transcript_api przy ograniczonym czasie żądania
+TRANSCRIPT_REQUEST_TIMEOUT = 30
+# Tłumaczenie (dodatkowe zapytanie) jest pomijane, gdy zostało mniej czasu
+TRANSLATION_MIN_SECONDS = float(os.environ.get('TRANSLATION_MIN_SECONDS', 1.0))
+
+METADATA_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+
+
+def parse_metadata_fields(fields: Any) -> Optional[List[str]]:
+    """
+    'title,channel' lub ['title', 'channel'] → lista pól metadanych.
+    
+    Returns:
+        Lista pól lub None (wszystkie pola)
+    
+    Raises:
+        ValueError: Gdy podano nieznane pole
+    """
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = list(dict.fromkeys(field.strip() for field in fields if field and field.strip()))
+    
+    unknown = [field for field in fields if field not in METADATA_FIELDS]
+    if unknown:
+        raise ValueError(f"Nieznane pola metadanych: {', '.join(unknown)} (dostępne: {', '.join(METADATA_FIELDS)})")
+    return fields or None
+
+
+def _default_metadata(video_id: str) -> Dict[str, Any]:
+    return {
+        'title': f"Video {video_id}",
+        'channel': "Unknown Channel",
+        'views': None,
+        'publish_date': None,
+        'description': "No description available",
+        'thumbnail': None,
+        'url': f"https://www.youtube.com/watch?v={video_id}"
+    }
+
+
+def get_video_metadata(
+    video_id: str,
+    fields: Optional[List[str]] = None,
+    deadline: Optional["Deadline"] = None
+) -> Dict[str, Any]:
+    """
+    Pobierz metadane filmu z YouTube
+    
+    Args:
+        video_id: ID filmu
+        fields: Potrzebne pola (None = wszystkie). Jeśli wszystkie są dostępne
+                z oEmbed (title, channel, thumbnail, url), strona filmu nie jest pobierana.
+                description, views i publish_date wymagają pełnego pobrania strony.
+        deadline: Termin żądania — timeouty są skracane do części pozostałego czasu,
+                  a przy jego braku pełna strona nie jest pobierana (tylko oEmbed).
+                  Pominięte pola trafiają do deadline.partial jako "metadata.<pole>".
+    
+    Returns:
+        Słownik z żądanymi polami
+    """
+    requested = list(fields) if fields else list(METADATA_FIELDS)
+    timeout = deadline.timeout(METADATA_TIMEOUT, METADATA_DEADLINE_SHARE) if deadline else METADATA_TIMEOUT
+    cheap_only = all(field in OEMBED_METADATA_FIELDS for field in requested)
+    
+    metadata = None
+    if not cheap_only and deadline and not deadline.allows(METADATA_SCRAPE_MIN_SECONDS):
+        # Za mało czasu na pełną stronę — tylko tanie pola, reszta oznaczona jako niepełna
+        metadata = _default_metadata(video_id)
+        skipped = [field for field in requested if field not in OEMBED_METADATA_FIELDS]
+        try:
+            metadata.update(fetch_oembed_metadata(video_id, timeout))
+        except Exception as e:
+            print(f"Błąd oEmbed: {e}")
+            skipped = requested
+        for field in skipped:
+            deadline.mark_partial(f"metadata.{field}")
+        return {field: metadata.get(field) for field in requested}
+    
+    if cheap_only:
+        try:
+            metadata = fetch_oembed_metadata(video_id, timeout)
+        except Exception as e:
+            print(f"Błąd oEmbed, pobieranie pełnej strony filmu: {e}")
+    
+    if metadata is None:
+        if deadline:
+            timeout = deadline.timeout(METADATA_TIMEOUT, METADATA_DEADLINE_SHARE)
+        try:
+            metadata = scrape_video_metadata(video_id, timeout)
+        except Exception as e:
+            print(f"Błąd podczas pobierania metadanych: {e}")
+            metadata = _default_metadata(video_id)
+            if deadline and deadline.limited:
+                for field in requested:
+                    deadline.mark_partial(f"metadata.{field}")
+    
+    return {field: metadata.get(field) for field in requested}
+
+
+def fetch_oembed_metadata(video_id: str, timeout: float = METADATA_TIMEOUT) -> Dict[str, Any]:
+    """Tanie metadane (tytuł, kanał, miniaturka) z endpointu oEmbed"""
+    import requests
+    
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    response = requests.get(
+        youtube_url(OEMBED_URL),
+        params={'url': url, 'format': 'json'},
+        headers=METADATA_HEADERS,
+        timeout=timeout
+    )
+    response.raise_for_status()
+    data = response.json()
+    
+    return {
+        'title': data.get('title') or f"Video {video_id}",
+        'channel': data.get('author_name') or "Unknown Channel",
+        'thumbnail': data.get('thumbnail_url'),
+        'url': url
+    }
+
+
+def scrape_video_metadata(video_id: str, timeout: float = METADATA_TIMEOUT) -> Dict[str, Any]:
+    """Pełne metadane ze strony filmu (HTML + dane JSON YouTube)"""
+    import requests
+    from bs4 import BeautifulSoup
+    
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    response = requests.get(youtube_url(url), headers=METADATA_HEADERS, timeout=timeout)
+    response.raise_for_status()
+    
+    html_content = response.text
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # Pobierz tytuł z różnych miejsc
+    title = None
+    
+    # Spróbuj pobrać tytuł z meta tagów
+    meta_title = soup.find('meta', property='og:title')
+    if meta_title:
+        title = meta_title.get('content')
+    
+    # Jeśli nie znaleziono, spróbuj z innego meta taga
+    if not title:
+        meta_title = soup.find('meta', name='title')
         if meta_title:
             title = meta_title.get('content')
-        
-        # Jeśli nie znaleziono, spróbuj z innego meta taga
-        if not title:
-            meta_title = soup.find('meta', name='title')
-            if meta_title:
-                title = meta_title.get('content')
-        
-        # Jeśli nadal nie znaleziono, spróbuj z title tag
-        if not title:
-            title_tag = soup.find('title')
-            if title_tag:
-                title = title_tag.get_text()
-                # Usuń " - YouTube" z końca
-                title = title.replace(' - YouTube', '').strip()
-        
-        # Pobierz nazwę kanału
-        channel_name = None
-        channel_link = soup.find('link', itemprop='name')
-        if channel_link:
-            channel_name = channel_link.get('content')
-        
-        # Pobierz liczbę wyświetleń
-        views = None
-        view_count = soup.find('meta', itemprop='interactionCount')
-        if view_count:
-            try:
-                views = int(view_count.get('content'))
-            except (ValueError, TypeError):
-                pass
-        
-        # Pobierz datę publikacji
-        publish_date = None
-        date_meta = soup.find('meta', itemprop='datePublished')
-        if date_meta:
-            publish_date = date_meta.get('content')
-        
-        # Pobierz PEŁNY opis - najpierw z danych JSON YouTube
-        description = None
-        
-        # Metoda 1: Z ytInitialData
-        yt_initial_data = extract_youtube_initial_data(html_content)
-        if yt_initial_data:
-            description = extract_full_description_from_data(yt_initial_data)
-        
-        # Metoda 2: Z ytInitialPlayerResponse (fallback)
-        if not description:
-            yt_player_response = extract_youtube_player_response(html_content)
-            if yt_player_response:
-                description = extract_full_description_from_data(yt_player_response)
-        
-        # Metoda 3: Fallback do meta tagu (skrócony opis)
-        if not description:
-            desc_meta = soup.find('meta', property='og:description')
-            if desc_meta:
-                description = desc_meta.get('content')
-        
-        # Pobierz miniaturkę
-        thumbnail = None
-        thumbnail_meta = soup.find('meta', property='og:image')
-        if thumbnail_meta:
-            thumbnail = thumbnail_meta.get('content')
-        
-        return {
-            'title': title or f"Video {video_id}",
-            'channel': channel_name or "Unknown Channel",
-            'views': views,
-            'publish_date': publish_date,
-            'description': description or "No description available",
-            'thumbnail': thumbnail,
-            'url': url
-        }
-        
-    except Exception as e:
-        print(f"Błąd podczas pobierania metadanych: {e}")
-        return {
-            'title': f"Video {video_id}",
-            'channel': "Unknown Channel",
-            'views': None,
-            'publish_date': None,
-            'description': "No description available",
-            'thumbnail': None,
-            'url': f"https://www.youtube.com/watch?v={video_id}"
-        }
+    
+    # Jeśli nadal nie znaleziono, spróbuj z title tag
+    if not title:
+        title_tag = soup.find('title')
+        if title_tag:
+            title = title_tag.get_text()
+            # Usuń " - YouTube" z końca
+            title = title.replace(' - YouTube', '').strip()
+    
+    # Pobierz nazwę kanału
+    channel_name = None
+    channel_link = soup.find('link', itemprop='name')
+    if channel_link:
+        channel_name = channel_link.get('content')
+    
+    # Pobierz liczbę wyświetleń
+    views = None
+    view_count = soup.find('meta', itemprop='interactionCount')
+    if view_count:
+        try:
+            views = int(view_count.get('content'))
+        except (ValueError, TypeError):
+            pass
+    
+    # Pobierz datę publikacji
+    publish_date = None
+    date_meta = soup.find('meta', itemprop='datePublished')
+    if date_meta:
+        publish_date = date_meta.get('content')
+    
+    # Pobierz PEŁNY opis - najpierw z danych JSON YouTube
+    description = None
+    
+    # Metoda 1: Z ytInitialData
+    yt_initial_data = extract_youtube_initial_data(html_content)
+    if yt_initial_data:
+        description = extract_full_description_from_data(yt_initial_data)
+    
+    # Metoda 2: Z ytInitialPlayerResponse (fallback)
+    if not description:
+        yt_player_response = extract_youtube_player_response(html_content)
+        if yt_player_response:
+            description = extract_full_description_from_data(yt_player_response)
+    
+    # Metoda 3: Fallback do meta tagu (skrócony opis)
+    if not description:
+        desc_meta = soup.find('meta', property='og:description')
+        if desc_meta:
+            description = desc_meta.get('content')
+    
+    # Pobierz miniaturkę
+    thumbnail = None
+    thumbnail_meta = soup.find('meta', property='og:image')
+    if thumbnail_meta:
+        thumbnail = thumbnail_meta.get('content')
+    
+    return {
+        'title': title or f"Video {video_id}",
+        'channel': channel_name or "Unknown Channel",
+        'views': views,
+        'publish_date': publish_date,
+        'description': description or "No description available",
+        'thumbnail': thumbnail,
+        'url': url
+    }
 
 
 def sanitize_filename(filename: str) -> str:
@@ -243,8 +387,14 @@ def sanitize_filename(filename: str) -> str:
     return filename
 
 
-class MarkdownFormatter(Formatter):
-    """Formater do konwersji transkrypcji na format Markdown"""
+class MarkdownFormatter:
+    """
+    Formater do konwersji transkrypcji na format Markdown
+    
+    Ten sam interfejs co formatery youtube_transcript_api (format_transcript,
+    format_transcripts), ale bez dziedziczenia — import tego modułu nie
+    wymaga ładowania biblioteki.
+    """
     
     def format_transcript(self, transcript, **kwargs) -> str:
         """Formatuje transkrypcję do Markdown"""
@@ -336,10 +486,38 @@ def get_video_id_from_url(url: str) -> str:
         return url
 
 
+def _create_transcript_api(deadline: Optional["Deadline"] = None) -> "YouTubeTranscriptApi":
+    """
+    Utwórz klienta youtube_transcript_api (import dopiero przy pierwszym użyciu).
+    
+    Z deadline każde zapytanie klienta (strona filmu, Innertube, napisy) dostaje
+    timeout nie dłuższy niż pozostały czas, a po jego upływie kolejne nie są wysyłane.
+    """
+    from youtube_transcript_api import YouTubeTranscriptApi
+    
+    if not YOUTUBE_BASE_URL and not (deadline and deadline.limited):
+        return YouTubeTranscriptApi()
+    return YouTubeTranscriptApi(http_client=_youtube_session(deadline))
+
+
+def _youtube_session(deadline: Optional["Deadline"] = None):
+    """requests.Session kierujący zapytania pod YOUTUBE_BASE_URL i pilnujący deadline żądania"""
+    import requests
+    
+    class YouTubeSession(requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            if deadline and deadline.limited:
+                deadline.check("youtube")
+                kwargs['timeout'] = deadline.timeout(kwargs.get('timeout') or TRANSCRIPT_REQUEST_TIMEOUT)
+            return super().request(method, youtube_url(url), *args, **kwargs)
+    
+    return YouTubeSession()
+
+
 def list_available_transcripts(video_id: str) -> None:
     """Wyświetl dostępne transkrypcje dla filmu"""
     try:
-        ytt_api = YouTubeTranscriptApi()
+        ytt_api = _create_transcript_api()
         transcript_list = ytt_api.list(video_id)
         
         print(f"\nDostępne transkrypcje dla filmu {video_id}:")
@@ -361,48 +539,180 @@ def list_available_transcripts(video_id: str) -> None:
         print(f"Błąd podczas pobierania listy transkrypcji: {e}")
 
 
+def _find_source_transcript(
+    ytt_api: "YouTubeTranscriptApi",
+    video_id: str,
+    languages: List[str],
+    exclude_generated: bool = False,
+    exclude_manually_created: bool = False
+):
+    """Znajdź (bez pobierania treści) transkrypcję źródłową spełniającą kryteria"""
+    if exclude_generated and exclude_manually_created:
+        raise ValueError("Nie można wykluczyć jednocześnie transkrypcji automatycznych i ręcznych")
+    
+    transcript_list = ytt_api.list(video_id)
+    
+    if exclude_generated:
+        return transcript_list.find_manually_created_transcript(languages)
+    elif exclude_manually_created:
+        return transcript_list.find_generated_transcript(languages)
+    else:
+        return transcript_list.find_transcript(languages)
+
+
 def fetch_transcript(
     video_id: str,
     languages: Optional[List[str]] = None,
     preserve_formatting: bool = False,
     translate_to: Optional[str] = None,
     exclude_generated: bool = False,
-    exclude_manually_created: bool = False
+    exclude_manually_created: bool = False,
+    deadline: Optional["Deadline"] = None
 ) -> str:
-    """Pobierz transkrypcję filmu"""
+    """
+    Pobierz transkrypcję filmu.
+    
+    Z deadline tłumaczenie jest pomijane (zwracana jest transkrypcja źródłowa,
+    a w deadline.partial ląduje "translation"), gdy zostało za mało czasu.
+    """
     try:
-        ytt_api = YouTubeTranscriptApi()
+        ytt_api = _create_transcript_api(deadline)
         
         if languages is None:
             languages = ['pl', 'en']
         
-        if exclude_generated and exclude_manually_created:
-            raise ValueError("Nie można wykluczyć jednocześnie transkrypcji automatycznych i ręcznych")
+        if not (translate_to or exclude_generated or exclude_manually_created):
+            return ytt_api.fetch(video_id, languages=languages, preserve_formatting=preserve_formatting)
         
-        if exclude_generated:
-            transcript_list = ytt_api.list(video_id)
-            transcript = transcript_list.find_manually_created_transcript(languages)
-        elif exclude_manually_created:
-            transcript_list = ytt_api.list(video_id)
-            transcript = transcript_list.find_generated_transcript(languages)
-        else:
-            transcript = ytt_api.fetch(video_id, languages=languages, preserve_formatting=preserve_formatting)
+        transcript = _find_source_transcript(
+            ytt_api, video_id, languages, exclude_generated, exclude_manually_created
+        )
         
-        if translate_to:
-            if isinstance(transcript, list):
-                raise ValueError("Tłumaczenie nie jest dostępne przy pobieraniu wielu transkrypcji")
+        if translate_to and deadline and not deadline.allows(TRANSLATION_MIN_SECONDS):
+            print(f"Brak czasu na tłumaczenie na '{translate_to}', zwracana transkrypcja źródłowa")
+            deadline.mark_partial("translation")
+        elif translate_to:
             transcript = transcript.translate(translate_to)
         
-        if isinstance(transcript, list):
-            return transcript[0] if transcript else ""
-        else:
-            return transcript
+        return transcript.fetch(preserve_formatting=preserve_formatting)
             
     except Exception as e:
         print(f"Błąd podczas pobierania transkrypcji: {e}")
         return ""
 
 
+def fetch_translations(
+    video_id: str,
+    translate_to: List[str],
+    languages: Optional[List[str]] = None,
+    preserve_formatting: bool = False,
+    exclude_generated: bool = False,
+    exclude_manually_created: bool = False,
+    max_workers: int = 4,
+    deadline: Optional["Deadline"] = None
+) -> Dict[str, Any]:
+    """
+    Pobierz transkrypcję przetłumaczoną na wiele języków naraz.
+    
+    Lista transkrypcji i transkrypcja źródłowa są ustalane raz, a tłumaczenia
+    pobierane równolegle. Zwraca słownik {kod_języka: transkrypcja} tylko dla
+    udanych tłumaczeń (w kolejności z translate_to). Z deadline tłumaczenia,
+    na które nie starczyło czasu, są pomijane i oznaczane jako "translations.<kod>".
+    """
+    try:
+        ytt_api = _create_transcript_api(deadline)
+        
+        if languages is None:
+            languages = ['pl', 'en']
+        
+        source = _find_source_transcript(
+            ytt_api, video_id, languages, exclude_generated, exclude_manually_created
+        )
+    except Exception as e:
+        print(f"Błąd podczas pobierania transkrypcji: {e}")
+        return {}
+    
+    def fetch_one(language_code: str):
+        if deadline and not deadline.allows(TRANSLATION_MIN_SECONDS):
+            deadline.mark_partial(f"translations.{language_code}")
+            return None
+        try:
+            return source.translate(language_code).fetch(preserve_formatting=preserve_formatting)
+        except Exception as e:
+            print(f"Błąd podczas tłumaczenia na '{language_code}': {e}")
+            if deadline and deadline.expired():
+                deadline.mark_partial(f"translations.{language_code}")
+            return None
+    
+    from concurrent.futures import ThreadPoolExecutor
+    
+    # Usuń duplikaty z zachowaniem kolejności
+    targets = list(dict.fromkeys(translate_to))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets)))) as executor:
+        results = list(executor.map(fetch_one, targets))
+    
+    return {code: transcript for code, transcript in zip(targets, results) if transcript}
+
+
+def with_name_suffix(path: str, suffix: str) -> str:
+    """Transcripts/Title.md → Transcripts/Title.de.md (np. sufiks języka lub zakresu)"""
+    base, ext = os.path.splitext(path)
+    return f"{base}.{suffix}{ext}"
+
+
+def build_start_index(transcript: Any) -> List[float]:
+    """Posortowana lista czasów startu segmentów (indeks do wyszukiwania binarnego)"""
+    return [snippet.start for snippet in transcript]
+
+
+def slice_transcript(
+    transcript: Any,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    first_segment: Optional[int] = None,
+    last_segment: Optional[int] = None,
+    starts: Optional[List[float]] = None
+):
+    """
+    Wytnij fragment transkrypcji wg czasu (sekundy) lub numerów segmentów.
+    
+    Zakres czasu [start, end) obejmuje segmenty, które na niego zachodzą;
+    numery segmentów (od 0) są włącznie. Granice wyszukiwane są binarnie
+    w indeksie czasów startu (build_start_index), więc koszt nie zależy od
+    długości całej transkrypcji.
+    
+    Returns:
+        Krotka (wycinek transkrypcji tego samego typu, indeks pierwszego segmentu, indeks za ostatnim)
+    """
+    if starts is None:
+        starts = build_start_index(transcript)
+    
+    lo, hi = 0, len(starts)
+    
+    if first_segment is not None:
+        lo = max(lo, first_segment)
+    if last_segment is not None:
+        hi = min(hi, last_segment + 1)
+    
+    if start is not None:
+        i = bisect.bisect_right(starts, start) - 1
+        # Segment zaczynający się przed `start` wchodzi tylko jeśli jeszcze trwa
+        if i >= 0 and starts[i] + getattr(transcript[i], 'duration', 0) <= start:
+            i += 1
+        lo = max(lo, i, 0)
+    if end is not None:
+        hi = min(hi, bisect.bisect_left(starts, end))
+    
+    hi = max(hi, lo)
+    
+    import dataclasses
+    
+    snippets = getattr(transcript, 'snippets', None)
+    if snippets is not None and dataclasses.is_dataclass(transcript):
+        return dataclasses.replace(transcript, snippets=snippets[lo:hi]), lo, hi
+    return transcript[lo:hi], lo, hi
+
+
 def encode_to_base64(content: str) -> str:
     """Zakoduj zawartość do base64"""
     try:
@@ -414,59 +724,259 @@ def encode_to_base64(content: str) -> str:
         return ""
 
 
+OUTPUT_FORMATS = ("text", "json", "srt", "vtt", "md")
+
+
+def split_list(values: Any) -> List[str]:
+    """'de,fr' lub ['de', 'fr,es'] → ['de', 'fr', 'es'] (bez pustych i powtórzeń, w podanej kolejności)"""
+    if not values:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    items = (item.strip() for value in values for item in str(value).split(','))
+    return list(dict.fromkeys(item for item in items if item))
+
+
+def parse_output_formats(formats: Any) -> List[str]:
+    """
+    'md,srt' lub ['md', 'srt'] → lista formatów wyjściowych.
+    
+    Raises:
+        ValueError: Gdy podano nieznany format
+    """
+    formats = split_list(formats)
+    unknown = [format_type for format_type in formats if format_type not in OUTPUT_FORMATS]
+    if unknown:
+        raise ValueError(f"Nieznane formaty: {', '.join(unknown)} (dostępne: {', '.join(OUTPUT_FORMATS)})")
+    return formats
+
+
+def format_transcript(transcript: Any, format_type: str = "text", metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Sformatuj transkrypcję do wybranego formatu"""
+    if format_type == "md":
+        formatter = MarkdownFormatter()
+        # Przekaż metadane do formatera Markdown
+        return formatter.format_transcript(transcript, metadata=metadata or {})
+    
+    from youtube_transcript_api.formatters import TextFormatter, JSONFormatter, SRTFormatter, WebVTTFormatter
+    
+    if format_type == "json":
+        formatter = JSONFormatter()
+        return formatter.format_transcript(transcript, indent=2)
+    elif format_type == "srt":
+        formatter = SRTFormatter()
+        return formatter.format_transcript(transcript)
+    elif format_type == "vtt":
+        formatter = WebVTTFormatter()
+        return formatter.format_transcript(transcript)
+    else:
+        formatter = TextFormatter()
+        return formatter.format_transcript(transcript)
+
+
+def _index_transcript(formatted_content: str, output_file: str) -> None:
+    """Zaindeksuj zapisaną transkrypcję .md (błędy indeksu nie przerywają zapisu)"""
+    try:
+        from transcript_index import INDEX_ENABLED, index_markdown
+        if INDEX_ENABLED:
+            index_markdown(formatted_content, output_file)
+    except Exception as e:
+        print(f"Błąd podczas indeksowania transkrypcji: {e}")
+
+
+def base64_path_for(output_file: str) -> str:
+    """Ścieżka pliku base64 dla transkrypcji .md"""
+    return output_file.replace('.md', '.b64')
+
+
+# Umask procesu, odczytany raz przy imporcie (os.umask nie ma odczytu bez zmiany,
+# a zmiana w trakcie pracy wątków zapisu byłaby wyścigiem)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_mode_for(path: str) -> int:
+    """Uprawnienia zapisywanego pliku: jak istniejącego, a dla nowego — jak przy open() (0666 & ~umask)"""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def write_file_atomic(path: str, content: str) -> None:
+    """Zapisz plik atomowo (plik tymczasowy w tym samym katalogu + rename) — czytelnik nigdy nie widzi połowy pliku"""
+    import tempfile
+    
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        # mkstemp tworzy plik 0600 — archiwum musi być czytelne dla innych (nginx, n8n, kopie)
+        os.chmod(tmp_path, file_mode_for(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_transcript_file(
+    formatted_content: str,
+    output_file: str,
+    format_type: str = "text",
+    encode_base64: bool = True,
+    base64_content: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Zapisz sformatowaną transkrypcję (i wersję base64 dla .md); zwraca opis zapisanych plików
+    
+    Args:
+        base64_content: Gotowa wersja base64 (jeśli już policzona), żeby nie kodować drugi raz
+    """
+    # Zapisz główny plik transkrypcji
+    write_file_atomic(output_file, formatted_content)
+    
+    print(f"Transkrypcja została zapisana w pliku: {output_file}")
+    artifact = {"format": format_type, "path": output_file}
+    
+    # Dodaj transkrypcję do indeksu wyszukiwania
+    if format_type == "md":
+        _index_transcript(formatted_content, output_file)
+    
+    # Zapisz wersję base64 jeśli format to md i włączono kodowanie
+    if format_type == "md" and encode_base64:
+        if base64_content is None:
+            base64_content = encode_to_base64(formatted_content)
+        if base64_content:
+            base64_file = base64_path_for(output_file)
+            write_file_atomic(base64_file, base64_content)
+            print(f"Wersja base64 została zapisana w pliku: {base64_file}")
+            artifact["base64_file"] = base64_file
+    
+    return artifact
+
+
 def save_transcript(transcript: Any, output_file: str, format_type: str = "text", video_id: str = "", metadata: Optional[Dict[str, Any]] = None, encode_base64: bool = True) -> None:
     """Zapisz transkrypcję do pliku w wybranym formacie"""
     try:
-        if format_type == "json":
-            formatter = JSONFormatter()
-            formatted_content = formatter.format_transcript(transcript, indent=2)
-        elif format_type == "srt":
-            formatter = SRTFormatter()
-            formatted_content = formatter.format_transcript(transcript)
-        elif format_type == "vtt":
-            formatter = WebVTTFormatter()
-            formatted_content = formatter.format_transcript(transcript)
-        elif format_type == "md":
-            formatter = MarkdownFormatter()
-            # Przekaż metadane do formatera Markdown
-            formatted_content = formatter.format_transcript(transcript, metadata=metadata or {})
-        else:
-            formatter = TextFormatter()
-            formatted_content = formatter.format_transcript(transcript)
-        
-        # Upewnij się, że folder docelowy istnieje
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        
-        # Zapisz główny plik transkrypcji
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(formatted_content)
-        
-        print(f"Transkrypcja została zapisana w pliku: {output_file}")
-        
-        # Zapisz wersję base64 jeśli format to md i włączono kodowanie
-        if format_type == "md" and encode_base64:
-            base64_content = encode_to_base64(formatted_content)
-            if base64_content:
-                base64_file = output_file.replace('.md', '.b64')
-                with open(base64_file, 'w', encoding='utf-8') as f:
-                    f.write(base64_content)
-                print(f"Wersja base64 została zapisana w pliku: {base64_file}")
-        
+        formatted_content = format_transcript(transcript, format_type, metadata)
+        write_transcript_file(formatted_content, output_file, format_type, encode_base64)
     except Exception as e:
         print(f"Błąd podczas zapisu pliku: {e}")
 
 
+def save_transcript_formats(
+    transcript: Any,
+    output_files: Dict[str, str],
+    metadata: Optional[Dict[str, Any]] = None,
+    encode_base64: bool = True,
+    max_workers: int = 4
+) -> List[Dict[str, Any]]:
+    """
+    Zapisz transkrypcję w wielu formatach naraz.
+    
+    Wszystkie formaty powstają z tych samych danych w pamięci, a pliki są
+    zapisywane równolegle. Zwraca listę zapisanych artefaktów (format, path,
+    base64_file, content) w kolejności output_files.
+    
+    Args:
+        output_files: Słownik {format: ścieżka pliku}
+    """
+    rendered = {}
+    for format_type in output_files:
+        try:
+            rendered[format_type] = format_transcript(transcript, format_type, metadata)
+        except Exception as e:
+            print(f"Błąd podczas formatowania ({format_type}): {e}")
+    
+    return write_rendered_formats(rendered, output_files, encode_base64, max_workers)
+
+
+def write_rendered_formats(
+    rendered: Dict[str, str],
+    output_files: Dict[str, str],
+    encode_base64: bool = True,
+    max_workers: int = 4
+) -> List[Dict[str, Any]]:
+    """Zapisz równolegle już sformatowane treści {format: treść}; zwraca artefakty jak save_transcript_formats"""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    def write(format_type: str) -> Optional[Dict[str, Any]]:
+        try:
+            artifact = write_transcript_file(rendered[format_type], output_files[format_type], format_type, encode_base64)
+            artifact["content"] = rendered[format_type]
+            return artifact
+        except Exception as e:
+            print(f"Błąd podczas zapisu pliku: {e}")
+            return None
+    
+    if not rendered:
+        return []
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(rendered)))) as executor:
+        artifacts = list(executor.map(write, list(rendered)))
+    
+    return [artifact for artifact in artifacts if artifact]
+
+
+def default_output_file(output_dir: str, format_type: str, video_id: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Domyślna ścieżka pliku: tytuł filmu dla .md, video_id dla pozostałych formatów"""
+    metadata = metadata or {}
+    
+    if format_type == "md" and metadata.get('title'):
+        # Użyj tytułu filmu jako nazwy pliku
+        safe_title = sanitize_filename(metadata['title'])
+        return os.path.join(output_dir, f"{safe_title}.md")
+    
+    # Dla innych formatów użyj video_id
+    return os.path.join(output_dir, f"{video_id}.{format_type}")
+
+
+def archive_video(
+    video_id: str,
+    languages: Optional[List[str]] = None,
+    formats: Optional[List[str]] = None,
+    output_dir: str = "Transcripts",
+    include_metadata: bool = True,
+    encode_base64: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Pełny, nieinteraktywny pipeline dla jednego filmu: metadane, transkrypcja,
+    zapis we wskazanych formatach. Zwraca listę zapisanych artefaktów (pusta = błąd).
+    """
+    formats = formats or ["md"]
+    metadata = get_video_metadata(video_id) if include_metadata else {}
+    
+    transcript = fetch_transcript(video_id=video_id, languages=languages)
+    if not transcript:
+        return []
+    
+    output_files = {
+        format_type: default_output_file(output_dir, format_type, video_id, metadata)
+        for format_type in dict.fromkeys(formats)
+    }
+    artifacts = save_transcript_formats(transcript, output_files, metadata, encode_base64)
+    for artifact in artifacts:
+        artifact.pop("content", None)
+    return artifacts
+
+
 def main():
     parser = argparse.ArgumentParser(description="Pobierz transkrypcje z YouTube")
-    parser.add_argument("video_id", help="ID filmu YouTube lub URL")
+    parser.add_argument("video_id", nargs="?", help="ID filmu YouTube lub URL")
     parser.add_argument("--languages", nargs="+", default=["pl", "en"],
                         help="Preferowane języki (domyślnie: pl en)")
-    parser.add_argument("--format", choices=["text", "json", "srt", "vtt", "md"],
-                        default="md", help="Format wyjściowy (domyślnie: md)")
+    parser.add_argument("--format", action="append", metavar="FORMAT",
+                        help=f"Format wyjściowy: {', '.join(OUTPUT_FORMATS)} (domyślnie: md); "
+                             "kilka naraz: --format md,srt lub --format md --format srt")
     parser.add_argument("--output", "-o", help="Nazwa pliku wyjściowego")
     parser.add_argument("--list", action="store_true",
                         help="Wyświetl dostępne transkrypcje")
-    parser.add_argument("--translate", help="Przetłumacz na podany język")
+    parser.add_argument("--translate", action="append", metavar="LANG",
+                        help="Przetłumacz na podany język (kilka naraz: --translate de,fr,es lub --translate de --translate fr)")
     parser.add_argument("--preserve-formatting", action="store_true",
                         help="Zachowaj formatowanie HTML")
     parser.add_argument("--exclude-generated", action="store_true",
@@ -475,32 +985,184 @@ def main():
                         help="Wyklucz transkrypcje ręczne")
     parser.add_argument("--no-metadata", action="store_true",
                         help="Nie pobieraj metadanych filmu (tytuł, kanał, etc.)")
+    parser.add_argument("--metadata-fields", metavar="FIELDS",
+                        help="Tylko wybrane pola metadanych, np. title,channel (bez pobierania strony filmu; "
+                             "przy zapisie .md pobierane są pełne metadane, a pola ograniczają wyjście konsoli; "
+                             f"dostępne: {', '.join(METADATA_FIELDS)})")
     parser.add_argument("--no-base64", action="store_true",
                         help="Nie twórz pliku base64 (domyślnie tworzy dla .md)")
     parser.add_argument("--no-notes", action="store_true",
                         help="Pomiń pytanie o generowanie notatek")
+    parser.add_argument("--start", metavar="TIME",
+                        help="Tylko fragment od podanego czasu (sekundy lub [HH:]MM:SS)")
+    parser.add_argument("--end", metavar="TIME",
+                        help="Tylko fragment do podanego czasu (sekundy lub [HH:]MM:SS)")
+    parser.add_argument("--segments", nargs=2, type=int, metavar=("FIRST", "LAST"),
+                        help="Tylko segmenty o numerach FIRST..LAST (od 0, włącznie)")
+    parser.add_argument("--sync-channels", nargs="+", metavar="CHANNEL",
+                        help="Pobierz transkrypcje nowych filmów z kanałów (ID UC... lub URL /channel/)")
+    parser.add_argument("--channels-file", metavar="FILE",
+                        help="Plik z listą kanałów do synchronizacji (jeden na linię)")
+    parser.add_argument("--sync-dry-run", action="store_true",
+                        help="Tylko pokaż nowe filmy, bez pobierania transkrypcji")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="Przeszukaj zarchiwizowane transkrypcje (indeks pełnotekstowy)")
+    parser.add_argument("--limit", type=int, default=20,
+                        help="Maks. liczba wyników wyszukiwania (domyślnie: 20)")
+    parser.add_argument("--rebuild-index", nargs="?", const="Transcripts", metavar="DIR",
+                        help="Zaktualizuj indeks wyszukiwania z katalogu (domyślnie: Transcripts)")
     
     args = parser.parse_args()
     
+    try:
+        args.format = parse_output_formats(args.format) or ["md"]
+    except ValueError as e:
+        parser.error(str(e))
+    args.translate = split_list(args.translate)
+    
+    if args.rebuild_index:
+        from transcript_index import rebuild_index
+        stats = rebuild_index(args.rebuild_index)
+        print(f"Indeks zaktualizowany: {stats['indexed']} zaindeksowano, {stats['unchanged']} bez zmian, "
+              f"{stats['removed']} usunięto, {stats['skipped']} pominięto")
+        if not args.search:
+            return
+    
+    if args.search:
+        from transcript_index import search
+        results = search(args.search, limit=args.limit)
+        if not results:
+            print("Brak wyników.")
+        for hit in results:
+            print(f"[{hit['timestamp']}] {hit['title']} ({hit['video_id']})")
+            print(f"    {hit['snippet']}")
+            print(f"    {hit['url']}")
+        return
+    
+    if args.sync_channels or args.channels_file:
+        from channel_sync import read_channels_file, sync_channels
+        channels = list(args.sync_channels or [])
+        if args.channels_file:
+            channels.extend(read_channels_file(args.channels_file))
+        
+        summary = sync_channels(
+            channels,
+            lambda new_video_id: bool(archive_video(
+                new_video_id,
+                languages=args.languages,
+                formats=args.format,
+                include_metadata=not args.no_metadata,
+                encode_base64=not args.no_base64
+            )),
+            dry_run=args.sync_dry_run
+        )
+        print(f"Kanały: {summary['channels']} (bez zmian: {summary['not_modified']}), "
+              f"nowe filmy: {len(summary['new_videos'])}, zarchiwizowane: {len(summary['processed'])}, "
+              f"nieudane: {len(summary['failed'])}")
+        for channel, error in summary['errors'].items():
+            print(f"  Błąd kanału {channel}: {error}")
+        if args.sync_dry_run:
+            for new_video_id in summary['new_videos']:
+                print(f"  {new_video_id}")
+        return
+    
+    if not args.video_id:
+        parser.error("Podaj ID filmu lub URL (albo użyj --search / --rebuild-index / --sync-channels)")
+    
     video_id = get_video_id_from_url(args.video_id)
     
     if args.list:
         list_available_transcripts(video_id)
         return
     
+    # Zakres (wycinek) transkrypcji — sprawdzany przed jakimkolwiek zapytaniem do YouTube
+    range_bounds = []
+    for option, value in (("--start", args.start), ("--end", args.end)):
+        try:
+            range_bounds.append(parse_timestamp(value) if value else None)
+        except ValueError:
+            parser.error(f"Nieprawidłowy czas {option} '{value}' (oczekiwano SS, MM:SS lub HH:MM:SS)")
+    range_start, range_end = range_bounds
+    
     # Pobierz metadane filmu
     metadata = {}
     if not args.no_metadata:
         print("Pobieranie metadanych filmu...")
-        metadata = get_video_metadata(video_id)
-        print(f"Tytuł: {metadata['title']}")
-        print(f"Kanał: {metadata['channel']}")
+        try:
+            metadata_fields = parse_metadata_fields(args.metadata_fields)
+        except ValueError as e:
+            parser.error(str(e))
+        # Plik .md zawiera pełne metadane — --metadata-fields nie może go zubożyć
+        # (nadpisałby pełną wersję w archiwum); wtedy ogranicza tylko wypisywane pola
+        fetch_fields = None if "md" in args.format else metadata_fields
+        metadata = get_video_metadata(video_id, fetch_fields)
+        shown = metadata_fields or METADATA_FIELDS
+        if metadata.get('title') and 'title' in shown:
+            print(f"Tytuł: {metadata['title']}")
+        if metadata.get('channel') and 'channel' in shown:
+            print(f"Kanał: {metadata['channel']}")
+    
+    formats = args.format
+    
+    first_segment, last_segment = args.segments if args.segments else (None, None)
+    has_range = any(value is not None for value in (range_start, range_end, first_segment, last_segment))
+    range_suffix = None
+    if has_range:
+        if args.segments:
+            range_suffix = f"seg{first_segment}-{last_segment}"
+        else:
+            range_suffix = f"{int(range_start or 0)}-{int(range_end) if range_end is not None else 'end'}s"
+    
+    def cut(transcript: Any) -> Any:
+        if not has_range:
+            return transcript
+        return slice_transcript(transcript, range_start, range_end, first_segment, last_segment)[0]
+    
+    def output_files_for(language_code: Optional[str] = None) -> Dict[str, str]:
+        output_files = {}
+        for format_type in formats:
+            if args.output:
+                # Przy kilku formatach --output to nazwa bazowa, rozszerzenie wg formatu
+                output_file = args.output if len(formats) == 1 else f"{os.path.splitext(args.output)[0]}.{format_type}"
+            else:
+                # Domyślnie zapisuj w folderze Transcripts z nazwą pliku zawierającą tytuł
+                output_file = default_output_file("Transcripts", format_type, video_id, metadata)
+            if language_code:
+                output_file = with_name_suffix(output_file, language_code)
+            if range_suffix:
+                # Wycinek nie nadpisuje pełnej transkrypcji w archiwum
+                output_file = with_name_suffix(output_file, range_suffix)
+            output_files[format_type] = output_file
+        return output_files
+    
+    if args.translate and len(args.translate) > 1:
+        # Wiele tłumaczeń: źródło i metadane ustalane raz, pliki z sufiksem języka
+        translations = fetch_translations(
+            video_id=video_id,
+            translate_to=args.translate,
+            languages=args.languages,
+            preserve_formatting=args.preserve_formatting,
+            exclude_generated=args.exclude_generated,
+            exclude_manually_created=args.exclude_manually_created
+        )
+        
+        if not translations:
+            print("Nie udało się pobrać transkrypcji")
+            sys.exit(1)
+        
+        for language_code, transcript in translations.items():
+            save_transcript_formats(cut(transcript), output_files_for(language_code), metadata, not args.no_base64)
+        
+        missing = [code for code in args.translate if code not in translations]
+        if missing:
+            print(f"Nie udało się przetłumaczyć na: {', '.join(missing)}")
+        return
     
     transcript = fetch_transcript(
         video_id=video_id,
         languages=args.languages,
         preserve_formatting=args.preserve_formatting,
-        translate_to=args.translate,
+        translate_to=args.translate[0] if args.translate else None,
         exclude_generated=args.exclude_generated,
         exclude_manually_created=args.exclude_manually_created
     )
@@ -509,25 +1171,12 @@ def main():
         print("Nie udało się pobrać transkrypcji")
         sys.exit(1)
     
-    if args.output:
-        output_file = args.output
-        save_transcript(transcript, output_file, args.format, video_id, metadata, not args.no_base64)
-    else:
-        # Domyślnie zapisuj w folderze Transcripts z nazwą pliku zawierającą tytuł
-        output_dir = "Transcripts"
-        
-        if args.format == "md":
-            # Użyj tytułu filmu jako nazwy pliku
-            safe_title = sanitize_filename(metadata['title'])
-            output_file = os.path.join(output_dir, f"{safe_title}.md")
-        else:
-            # Dla innych formatów użyj video_id
-            output_file = os.path.join(output_dir, f"{video_id}.{args.format}")
-        
-        save_transcript(transcript, output_file, args.format, video_id, metadata, not args.no_base64)
+    output_files = output_files_for()
+    save_transcript_formats(cut(transcript), output_files, metadata, not args.no_base64)
     
     # ── Generowanie notatek (tylko dla formatu md, interaktywnie) ──
-    if args.format == "md" and not args.no_notes:
+    if "md" in output_files and not args.no_notes:
+        output_file = output_files["md"]
         try:
             from notes_agent import interactive_notes_flow
 